@@ -195,28 +195,35 @@ def create_reservation():
             mysql.connection.commit()
             guest_id = cur.lastrowid
 
-        # Check room availability
+        # Lock the room type row so concurrent bookings of the same type queue
+        # behind this check; bookings of other types are not held up
+        cur.execute("SELECT id FROM room_types WHERE id = %s FOR UPDATE", (data['room_type_id'],))
+
+        # Check room availability: bookable rooms of the type minus the busiest
+        # night of the stay. Reservations are booked against the room type and
+        # usually have no room yet, so counting by room_id would miss them.
         cur.execute("""
-            SELECT COUNT(*) as available_rooms
+            SELECT COUNT(*) as room_count
             FROM rooms r
-            WHERE r.room_type_id = %s
-            AND r.status = 'available'
-            AND r.id NOT IN (
-                SELECT res.room_id
-                FROM reservations res
-                WHERE (res.check_in_date BETWEEN %s AND %s
-                OR res.check_out_date BETWEEN %s AND %s
-                OR (res.check_in_date <= %s AND res.check_out_date >= %s))
-                AND res.status != 'cancelled'
-            )
-        """, (
-            data['room_type_id'],
-            data['check_in_date'], data['check_out_date'],
-            data['check_in_date'], data['check_out_date'],
-            data['check_in_date'], data['check_out_date']
-        ))
+            WHERE r.room_type_id = %s AND r.status != 'maintenance'
+        """, (data['room_type_id'],))
+        room_count = cur.fetchone()['room_count']
 
-        availability = cur.fetchone()
+        cur.execute("""
+            SELECT check_in_date, check_out_date
+            FROM reservations
+            WHERE room_type_id = %s
+            AND status IN ('confirmed', 'checked-in')
+            AND check_in_date < %s AND check_out_date > %s
+        """, (data['room_type_id'], data['check_out_date'], data['check_in_date']))
+
+        booked = [0] * max((check_out - check_in).days, 0)
+        for stay in cur.fetchall():
+            first = max((stay['check_in_date'] - check_in.date()).days, 0)
+            last = min((stay['check_out_date'] - check_in.date()).days, len(booked))
+            for night in range(first, last):
+                booked[night] += 1
+        availability = {'available_rooms': room_count - max(booked, default=0)}
 
         if availability and availability['available_rooms'] > 0:
             # Calculate total price
@@ -225,6 +232,8 @@ def create_reservation():
             room_type = cur.fetchone()
 
             if not room_type:
+                # Release the FOR UPDATE lock taken on the room type above
+                mysql.connection.rollback()
                 return jsonify({'error': 'Invalid room type'}), 400
 
             base_price = room_type['base_price']
@@ -276,6 +285,7 @@ def create_reservation():
                 'reservation': new_reservation
             })
         else:
+            mysql.connection.rollback()
             return jsonify({'error': 'No rooms available for the selected dates and room type'}), 400
 
     except Exception as e:
@@ -1304,53 +1314,69 @@ def create_guest():
         cur.close()
 
 # API Routes for Dashboard Statistics
+def fetch_dashboard_stats(cur, today):
+    """Fetch every dashboard counter in one statement and the recent reservations in a second."""
+    yesterday = today - timedelta(days=1)
+    cur.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM rooms) as all_rooms,
+            (SELECT COUNT(*) FROM rooms WHERE status = 'maintenance') as maintenance,
+            (SELECT COUNT(DISTINCT r.id)
+                FROM rooms r
+                JOIN reservations res ON res.room_id = r.id
+                WHERE res.status IN ('checked-in', 'confirmed')
+                AND res.check_in_date <= %s AND res.check_out_date > %s) as occupied,
+            (SELECT COUNT(*) FROM reservations
+                WHERE check_in_date = %s AND status = 'confirmed') as todays_checkins,
+            (SELECT COUNT(*) FROM reservations
+                WHERE check_out_date = %s AND status = 'checked-in') as todays_checkouts,
+            (SELECT COUNT(*) FROM reservations
+                WHERE created_at >= %s AND created_at < %s) as todays_reservations,
+            (SELECT COUNT(*) FROM guests) as total_guests,
+            (SELECT COALESCE(SUM(total_price), 0) FROM reservations
+                WHERE check_in_date = %s AND status != 'cancelled') as today_revenue,
+            (SELECT COALESCE(SUM(total_price), 0) FROM reservations
+                WHERE check_in_date = %s AND status != 'cancelled') as yesterday_revenue,
+            (SELECT COALESCE(SUM(total_price), 0) FROM reservations
+                WHERE check_in_date >= DATE_SUB(%s, INTERVAL 30 DAY) AND status != 'cancelled') as month_revenue
+    """, (today, today, today, today, today, today + timedelta(days=1),
+          today, yesterday, today))
+    counters = cur.fetchone()
+
+    cur.execute("""
+        SELECT r.id, r.check_in_date, r.check_out_date, r.status, r.total_price,
+            g.name as guest_name, rt.name as room_type_name
+        FROM reservations r
+        JOIN guests g ON r.guest_id = g.id
+        JOIN room_types rt ON r.room_type_id = rt.id
+        ORDER BY r.created_at DESC
+        LIMIT 5
+    """)
+    recent_reservations = cur.fetchall()
+
+    # Format dates
+    for res in recent_reservations:
+        res['check_in_date'] = res['check_in_date'].strftime('%Y-%m-%d')
+        res['check_out_date'] = res['check_out_date'].strftime('%Y-%m-%d')
+
+    return counters, recent_reservations
+
+
 @app.route('/dashboard')
 def dashboard():
     if 'logged_in' not in session:
         return redirect(url_for('login'))
 
+    cur = mysql.connection.cursor()
+
     try:
-        # Fetch dashboard stats directly from the database
-        cur = mysql.connection.cursor()
-        
-        # Get current date
-        today = datetime.now().date()
-        
-        # Get basic stats
-        cur.execute("SELECT COUNT(*) as total FROM rooms")
-        total_rooms = cur.fetchone()['total']
-        
-        cur.execute("""
-            SELECT COUNT(DISTINCT r.id) as occupied 
-            FROM rooms r
-            JOIN reservations res ON res.room_id = r.id
-            WHERE res.status IN ('checked-in', 'confirmed')
-            AND res.check_in_date <= %s AND res.check_out_date > %s
-        """, (today, today))
-        occupied_rooms = cur.fetchone()['occupied']
-        
-        cur.execute("SELECT COUNT(*) as maintenance FROM rooms WHERE status = 'maintenance'")
-        maintenance_rooms = cur.fetchone()['maintenance']
-        
+        counters, recent_reservations = fetch_dashboard_stats(cur, datetime.now().date())
+
+        total_rooms = counters['all_rooms']
+        occupied_rooms = counters['occupied']
+        maintenance_rooms = counters['maintenance']
         available_rooms = total_rooms - occupied_rooms - maintenance_rooms
-        
-        # Get recent reservations
-        cur.execute("""
-            SELECT r.id, r.check_in_date, r.check_out_date, r.status, r.total_price,
-                g.name as guest_name, rt.name as room_type_name
-            FROM reservations r
-            JOIN guests g ON r.guest_id = g.id
-            JOIN room_types rt ON r.room_type_id = rt.id
-            ORDER BY r.created_at DESC
-            LIMIT 5
-        """)
-        recent_reservations = cur.fetchall()
-        
-        # Format dates
-        for res in recent_reservations:
-            res['check_in_date'] = res['check_in_date'].strftime('%Y-%m-%d')
-            res['check_out_date'] = res['check_out_date'].strftime('%Y-%m-%d')
-        
+
         # Basic stats for initial page load
         stats = {
             'total_rooms': total_rooms,
@@ -1358,10 +1384,10 @@ def dashboard():
             'available_rooms': available_rooms,
             'maintenance_rooms': maintenance_rooms,
             'occupancy_rate': round((occupied_rooms / (total_rooms - maintenance_rooms) * 100), 2) if (total_rooms - maintenance_rooms) > 0 else 0,
-            'todays_checkins': 0,  # Will be updated by JavaScript
-            'todays_checkouts': 0,  # Will be updated by JavaScript
+            'todays_checkins': counters['todays_checkins'],
+            'todays_checkouts': counters['todays_checkouts'],
             'revenue': {
-                'today': 0  # Will be updated by JavaScript
+                'today': float(counters['today_revenue'])
             },
             'recent_reservations': recent_reservations
         }
@@ -1396,93 +1422,20 @@ def get_dashboard_stats():
     cur = mysql.connection.cursor()
 
     try:
-        # Get current date
-        today = datetime.now().date()
-        yesterday = today - timedelta(days=1)
-        tomorrow = today + timedelta(days=1)
-
-        # Get total rooms count (excluding maintenance)
-        cur.execute("SELECT COUNT(*) as total FROM rooms WHERE status != 'maintenance'")
-        total_rooms = cur.fetchone()['total']
+        counters, recent_reservations = fetch_dashboard_stats(cur, datetime.now().date())
 
-        # Get occupied rooms (both checked-in and reserved)
-        cur.execute("""
-            SELECT COUNT(DISTINCT r.id) as occupied 
-            FROM rooms r
-            JOIN reservations res ON res.room_id = r.id
-            WHERE res.status IN ('checked-in', 'confirmed')
-            AND res.check_in_date <= %s AND res.check_out_date > %s
-        """, (today, today))
-        occupied_result = cur.fetchone()
-        occupied_rooms = occupied_result['occupied'] if occupied_result else 0
-
-        # Get maintenance rooms
-        cur.execute("SELECT COUNT(*) as maintenance FROM rooms WHERE status = 'maintenance'")
-        maintenance_result = cur.fetchone()
-        maintenance_rooms = maintenance_result['maintenance'] if maintenance_result else 0
-
-        # Calculate available rooms
+        # Total rooms excludes maintenance here
+        total_rooms = counters['all_rooms'] - counters['maintenance']
+        occupied_rooms = counters['occupied']
+        maintenance_rooms = counters['maintenance']
         available_rooms = total_rooms - occupied_rooms
 
-        # Get today's check-ins
-        cur.execute("""
-            SELECT COUNT(*) as total FROM reservations 
-            WHERE check_in_date = %s AND status = 'confirmed'
-        """, (today,))
-        todays_checkins = cur.fetchone()['total']
-
-        # Get today's check-outs
-        cur.execute("""
-            SELECT COUNT(*) as total FROM reservations 
-            WHERE check_out_date = %s AND status = 'checked-in'
-        """, (today,))
-        todays_checkouts = cur.fetchone()['total']
-
-        # Get today's reservations
-        cur.execute("""
-            SELECT COUNT(*) as total FROM reservations 
-            WHERE DATE(created_at) = %s
-        """, (today,))
-        todays_reservations = cur.fetchone()['total']
-
-        # Get total guests
-        cur.execute("SELECT COUNT(*) as total FROM guests")
-        total_guests = cur.fetchone()['total']
-
-        # Get revenue stats
-        cur.execute("""
-            SELECT 
-                COALESCE(SUM(CASE WHEN DATE(check_in_date) = %s THEN total_price ELSE 0 END), 0) as today_revenue,
-                COALESCE(SUM(CASE WHEN DATE(check_in_date) = %s THEN total_price ELSE 0 END), 0) as yesterday_revenue,
-                COALESCE(SUM(CASE WHEN check_in_date >= DATE_SUB(%s, INTERVAL 30 DAY) THEN total_price ELSE 0 END), 0) as month_revenue
-            FROM reservations
-            WHERE status != 'cancelled'
-        """, (today, yesterday, today))
-        revenue = cur.fetchone()
-
         # Get occupancy rate (excluding maintenance rooms)
         if total_rooms > 0:
             occupancy_rate = round((occupied_rooms / total_rooms) * 100, 2)
         else:
             occupancy_rate = 0
 
-        # Get recent reservations
-        cur.execute("""
-            SELECT r.id, r.check_in_date, r.check_out_date, r.status, r.total_price,
-                g.name as guest_name, rt.name as room_type_name
-            FROM reservations r
-            JOIN guests g ON r.guest_id = g.id
-            JOIN room_types rt ON r.room_type_id = rt.id
-            ORDER BY r.created_at DESC
-            LIMIT 5
-        """)
-        recent_reservations = cur.fetchall()
-
-        # Format dates for JSON response
-        for res in recent_reservations:
-            res['check_in_date'] = res['check_in_date'].strftime('%Y-%m-%d')
-            res['check_out_date'] = res['check_out_date'].strftime('%Y-%m-%d')
-
         # Compile all stats
         stats = {
             'total_rooms': total_rooms,
@@ -1490,14 +1443,14 @@ def get_dashboard_stats():
             'available_rooms': available_rooms,
             'maintenance_rooms': maintenance_rooms,
             'occupancy_rate': occupancy_rate,
-            'todays_checkins': todays_checkins,
-            'todays_checkouts': todays_checkouts,
-            'todays_reservations': todays_reservations,
-            'total_guests': total_guests,
+            'todays_checkins': counters['todays_checkins'],
+            'todays_checkouts': counters['todays_checkouts'],
+            'todays_reservations': counters['todays_reservations'],
+            'total_guests': counters['total_guests'],
             'revenue': {
-                'today': float(revenue['today_revenue']),
-                'yesterday': float(revenue['yesterday_revenue']),
-                'month': float(revenue['month_revenue'])
+                'today': float(counters['today_revenue']),
+                'yesterday': float(counters['yesterday_revenue']),
+                'month': float(counters['month_revenue'])
             },
             'recent_reservations': recent_reservations
         }
@@ -1542,24 +1495,31 @@ def get_occupancy_report():
         cur.execute("SELECT COUNT(*) as total FROM rooms")
         total_rooms = cur.fetchone()['total']
 
-        # Generate date range
-        date_range = []
-        current_date = start
-        while current_date <= end:
-            date_range.append(current_date)
-            current_date += timedelta(days=1)
+        # Load every stay overlapping the range once, then sweep it into
+        # per-night counts: +1 on check-in, -1 on check-out, prefix sum.
+        cur.execute("""
+            SELECT room_type_id, check_in_date, check_out_date FROM reservations 
+            WHERE status IN ('confirmed', 'checked-in') 
+            AND check_in_date <= %s AND check_out_date > %s
+        """, (end, start))
+        stays = cur.fetchall()
+
+        num_days = (end - start).days + 1
+        deltas = [0] * (num_days + 1)
+        for stay in stays:
+            first = max((stay['check_in_date'] - start).days, 0)
+            last = min((stay['check_out_date'] - start).days, num_days)
+            if first < last:
+                deltas[first] += 1
+                deltas[last] -= 1
 
         # Get occupancy data for each date
         occupancy_data = []
+        occupied = 0
 
-        for date in date_range:
-            # Count occupied rooms
-            cur.execute("""
-                SELECT COUNT(*) as occupied FROM reservations 
-                WHERE status IN ('confirmed', 'checked-in') 
-                AND check_in_date <= %s AND check_out_date > %s
-            """, (date, date))
-            occupied = cur.fetchone()['occupied']
+        for offset in range(num_days):
+            date = start + timedelta(days=offset)
+            occupied += deltas[offset]
 
             # Calculate occupancy rate
             occupancy_rate = round(
@@ -1572,7 +1532,8 @@ def get_occupancy_report():
                 'occupancy_rate': occupancy_rate
             })
 
-        # Get occupancy by room type
+        # Get occupancy by room type: room-nights sold over room-nights
+        # available, from the stays already loaded for the daily sweep
         cur.execute("""
             SELECT rt.id, rt.name, COUNT(r.id) as room_count
             FROM room_types rt
@@ -1581,28 +1542,23 @@ def get_occupancy_report():
         """)
         room_types = cur.fetchall()
 
+        nights_sold = {}
+        for stay in stays:
+            first = max((stay['check_in_date'] - start).days, 0)
+            last = min((stay['check_out_date'] - start).days, num_days)
+            if first < last:
+                nights_sold[stay['room_type_id']] = nights_sold.get(
+                    stay['room_type_id'], 0) + last - first
+
         room_type_occupancy = []
 
         for rt in room_types:
-            # Get average occupancy for this room type
-            cur.execute("""
-                SELECT AVG(
-                    CASE WHEN res.status IN ('confirmed', 'checked-in') 
-                    AND res.check_in_date <= %s AND res.check_out_date > %s 
-                    THEN 1 ELSE 0 END
-                ) * 100 as avg_occupancy
-                FROM rooms r
-                LEFT JOIN reservations res ON res.room_id = r.id
-                WHERE r.room_type_id = %s
-            """, (end, start, rt['id']))
-
-            avg_occupancy = cur.fetchone()['avg_occupancy']
-
+            nights_available = rt['room_count'] * num_days
             room_type_occupancy.append({
                 'room_type_id': rt['id'],
                 'room_type_name': rt['name'],
                 'room_count': rt['room_count'],
-                'avg_occupancy_rate': round(float(avg_occupancy or 0), 2)
+                'avg_occupancy_rate': round(nights_sold.get(rt['id'], 0) / nights_available * 100, 2) if nights_available > 0 else 0
             })
 
         report = {
@@ -1647,29 +1603,26 @@ def get_revenue_report():
     cur = mysql.connection.cursor()
 
     try:
-        # Generate date range
-        date_range = []
-        current_date = start
-        while current_date <= end:
-            date_range.append(current_date)
-            current_date += timedelta(days=1)
-
-        # Get revenue data for each date
+        # Get revenue for the whole range in one grouped query
+        cur.execute("""
+            SELECT check_in_date, SUM(total_price) as daily_revenue, COUNT(*) as reservation_count
+            FROM reservations 
+            WHERE check_in_date BETWEEN %s AND %s AND status != 'cancelled'
+            GROUP BY check_in_date
+        """, (start, end))
+        revenue_by_date = {row['check_in_date']: row for row in cur.fetchall()}
+
+        # Fill days without check-ins with zero
         revenue_data = []
 
-        for date in date_range:
-            # Get revenue for this date
-            cur.execute("""
-                SELECT SUM(total_price) as daily_revenue, COUNT(*) as reservation_count
-                FROM reservations 
-                WHERE check_in_date = %s AND status != 'cancelled'
-            """, (date,))
-            result = cur.fetchone()
+        for offset in range((end - start).days + 1):
+            date = start + timedelta(days=offset)
+            result = revenue_by_date.get(date)
 
             revenue_data.append({
                 'date': date.strftime('%Y-%m-%d'),
-                'revenue': float(result['daily_revenue'] or 0),
-                'reservation_count': result['reservation_count']
+                'revenue': float(result['daily_revenue'] or 0) if result else 0.0,
+                'reservation_count': result['reservation_count'] if result else 0
             })
 
         # Get revenue by room type
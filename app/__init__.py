@@ -18,17 +18,30 @@ def create_app(config_class=Config):
     login_manager.init_app(app)
     migrate.init_app(app, db)
 
+    from .services.cache import report_cache
+    from .services.room_state import room_counters
+    from .services.pricing import rate_table
+    from .services.query_budget import query_budget
+    from .services.events import activity_poller
+    report_cache.init_app(app)
+    room_counters.init_app(app)
+    rate_table.init_app(app)
+    query_budget.init_app(app)
+    activity_poller.init_app(app)
+
     from .blueprints.auth import auth_bp
     from .blueprints.core import core_bp
     from .blueprints.billing import billing_bp
     from .blueprints.reports import reports_bp
     from .blueprints.settings import settings_bp
+    from .blueprints.pricing import pricing_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(core_bp)
     app.register_blueprint(billing_bp)
     app.register_blueprint(reports_bp)
     app.register_blueprint(settings_bp)
+    app.register_blueprint(pricing_bp)
 
     @app.route('/health')
     def health():
@@ -4,10 +4,24 @@ from .. import db
 from ..models.billing import Invoice, Payment
 from ..models.core import Reservation
 from ..models.setting import Setting
+from ..services.export import EXPORT_FORMATS, export_response, stream_query
+from ..services.activity import record_activity
+from ..services.pagination import ListArgsError, page_args, list_filters, keyset_page, list_response
+from ..services.projection import Field, as_str, requested_fields, projection_query, project_rows
 from decimal import Decimal
 
 billing_bp = Blueprint('billing', __name__)
 
+# Fields selectable with ?fields= on the invoice list
+INVOICE_FIELDS = {
+    'id': Field(Invoice.id),
+    'reservation_id': Field(Invoice.reservation_id),
+    'subtotal': Field(Invoice.subtotal, as_str),
+    'tax': Field(Invoice.tax, as_str),
+    'total': Field(Invoice.total, as_str),
+    'status': Field(Invoice.status),
+}
+
 # Page routes
 @billing_bp.route('/billing')
 @login_required
@@ -18,8 +32,41 @@ def billing_page():
 @billing_bp.route('/api/billing/invoices', methods=['GET'])
 @login_required
 def list_invoices():
-    invoices = Invoice.query.order_by(Invoice.created_at.desc()).all()
-    return jsonify([{'id':i.id,'reservation_id':i.reservation_id,'subtotal':str(i.subtotal),'tax':str(i.tax),'total':str(i.total),'status':i.status} for i in invoices])
+    try:
+        limit, after = page_args(request.args)
+        filters = list_filters(request.args)
+        names = requested_fields(request.args, INVOICE_FIELDS)
+    except ListArgsError as e:
+        return jsonify({'error': str(e)}), 400
+    conditions = []
+    if filters['status']:
+        conditions.append(Invoice.status.in_(filters['status']))
+    if filters['start']:
+        conditions.append(Invoice.created_at >= filters['start'])
+    if filters['end']:
+        conditions.append(Invoice.created_at < filters['end'])
+    if filters['room_type_id']:
+        conditions.append(Invoice.reservation_id.in_(
+            db.session.query(Reservation.id).filter(Reservation.room_type_id == filters['room_type_id'])))
+    fmt = request.args.get('format')
+    if fmt in EXPORT_FORMATS:
+        rows = stream_query(db.session.query(
+            Invoice.id, Invoice.reservation_id, Invoice.subtotal, Invoice.tax, Invoice.total, Invoice.status
+        ).filter(*conditions).order_by(Invoice.created_at.desc(), Invoice.id.desc()))
+        return export_response(({'id':i.id,'reservation_id':i.reservation_id,'subtotal':str(i.subtotal),'tax':str(i.tax),'total':str(i.total),'status':i.status} for i in rows),
+                               ['id','reservation_id','subtotal','tax','total','status'], fmt, 'invoices')
+    # Newest first; id breaks ties between invoices created in the same instant
+    keys = [Invoice.created_at, Invoice.id]
+    try:
+        if names:
+            rows, next_cursor = keyset_page(projection_query(Invoice, INVOICE_FIELDS, names, keys).filter(*conditions),
+                                            keys, limit, after, descending=True)
+            return list_response(project_rows(rows, INVOICE_FIELDS, names), next_cursor, limit)
+        invoices, next_cursor = keyset_page(Invoice.query.filter(*conditions), keys, limit, after, descending=True)
+    except ListArgsError as e:
+        return jsonify({'error': str(e)}), 400
+    return list_response([{'id':i.id,'reservation_id':i.reservation_id,'subtotal':str(i.subtotal),'tax':str(i.tax),'total':str(i.total),'status':i.status} for i in invoices],
+                         next_cursor, limit)
 
 @billing_bp.route('/api/billing/invoices', methods=['POST'])
 @login_required
@@ -36,6 +83,8 @@ def create_invoice():
     total = subtotal + tax
     inv = Invoice(reservation_id=rid, subtotal=subtotal, tax=tax, total=total)
     db.session.add(inv)
+    db.session.flush()
+    record_activity('invoice', f'Invoice #{inv.id} created - ${total:.2f}', inv.id)
     db.session.commit()
     return jsonify({'success': True,'invoice_id': inv.id})
 
@@ -54,5 +103,6 @@ def add_payment(invoice_id):
     paid_sum = sum(p.amount for p in inv.payments) + amount
     if paid_sum >= inv.total:
         inv.status = 'paid'
+    record_activity('payment', f'Payment received - ${amount:.2f}', inv.id)
     db.session.commit()
     return jsonify({'success': True})
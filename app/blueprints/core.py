@@ -1,27 +1,77 @@
-from flask import Blueprint, render_template, jsonify, request
+from flask import Blueprint, render_template, jsonify, request, Response, stream_with_context, current_app
 from flask_login import login_required
 from .. import db
 from ..models.core import Room, RoomType, Guest, Reservation, Service
 from ..models.billing import Invoice, Payment
 from ..models.setting import Setting
-from datetime import date
+from ..services.nights import sync_nights, restamp_nights
+from ..services.export import EXPORT_FORMATS, export_response, stream_query
+from ..services.dashboard import dashboard_snapshot
+from ..services.events import dashboard_events
+from ..services.activity import record_activity, recent_events, events_since, serialize_event
+from ..services.room_state import room_counters
+from ..services.availability import availability_calendar, MAX_CALENDAR_NIGHTS
+from ..services.assignment import assign_rooms
+from ..services.inventory import SoldOut
+from ..services.booking import BULK_MODES, MAX_BULK_ITEMS, SOLD_OUT, book_block
+from ..services.pricing import quote
+from ..services.pagination import ListArgsError, page_args, list_filters, keyset_page, list_response
+from ..services.query_budget import query_budget
+from ..services.serializers import RoomSerializer, ReservationSerializer, InvoiceDetailSerializer
+from ..services.projection import Field, as_float, as_iso, requested_fields, projection_query, project_rows
+from datetime import date, datetime, timedelta
 from sqlalchemy import func
 
 core_bp = Blueprint('core', __name__)
 
+# Claims, revenue aggregates, nights and activity on a cold cache; independent of stay length
+RESERVATION_WRITE_BUDGET = 35
+
+# Fields selectable with ?fields= on the list APIs, each backed by one SQL column
+ROOM_TYPE_JOIN = (RoomType, Room.room_type_id == RoomType.id)
+GUEST_JOIN = (Guest, Reservation.guest_id == Guest.id)
+ROOM_JOIN = (Room, Reservation.room_id == Room.id)
+ROOM_FIELDS = {
+    'id': Field(Room.id),
+    'number': Field(Room.number),
+    'type': Field(RoomType.name, lambda name: name or 'N/A', ROOM_TYPE_JOIN),
+    'status': Field(Room.status),
+}
+ROOM_TYPE_FIELDS = {
+    'id': Field(RoomType.id),
+    'name': Field(RoomType.name),
+    'description': Field(RoomType.description),
+    'base_price': Field(RoomType.base_price, as_float),
+}
+GUEST_FIELDS = {
+    'id': Field(Guest.id),
+    'name': Field(Guest.name),
+    'email': Field(Guest.email),
+    'phone': Field(Guest.phone),
+    'address': Field(Guest.address),
+}
+RESERVATION_FIELDS = {
+    'id': Field(Reservation.id),
+    'guest_name': Field(Guest.name, lambda name: name or 'N/A', GUEST_JOIN),
+    'room_number': Field(Room.number, lambda number: number or 'N/A', ROOM_JOIN),
+    'check_in': Field(Reservation.check_in, as_iso),
+    'check_out': Field(Reservation.check_out, as_iso),
+    'status': Field(Reservation.status),
+    'total_price': Field(Reservation.total_price, as_float),
+}
+SERVICE_FIELDS = {
+    'id': Field(Service.id),
+    'name': Field(Service.name),
+    'type': Field(Service.type),
+    'price': Field(Service.price, as_float),
+    'status': Field(Service.status),
+    'description': Field(Service.description),
+}
+
 @core_bp.route('/')
 @login_required
 def dashboard():
-    total_rooms = Room.query.count()
-    occupied = Reservation.query.filter(Reservation.status.in_(['confirmed','checked-in']), Reservation.check_in <= date.today(), Reservation.check_out > date.today()).count()
-    maintenance = Room.query.filter_by(status='maintenance').count()
-    available = total_rooms - occupied - maintenance
-    return render_template('dashboard.html', stats={
-        'total_rooms': total_rooms,
-        'occupied_rooms': occupied,
-        'available_rooms': available,
-        'maintenance_rooms': maintenance
-    })
+    return render_template('dashboard.html', stats=dashboard_snapshot())
 
 # Page Routes
 @core_bp.route('/rooms')
@@ -53,13 +103,35 @@ def services():
 @core_bp.route('/api/rooms')
 @login_required
 def api_rooms():
-    rooms = Room.query.all()
-    return jsonify([{'id':r.id,'number':r.number,'type': r.room_type.name if r.room_type else 'N/A','status':r.status} for r in rooms])
+    try:
+        limit, after = page_args(request.args)
+        filters = list_filters(request.args)
+        names = requested_fields(request.args, ROOM_FIELDS)
+        conditions = []
+        if filters['status']:
+            conditions.append(Room.status.in_(filters['status']))
+        if filters['room_type_id']:
+            conditions.append(Room.room_type_id == filters['room_type_id'])
+        if names:
+            rows, next_cursor = keyset_page(projection_query(Room, ROOM_FIELDS, names, [Room.id]).filter(*conditions),
+                                            [Room.id], limit, after)
+            return list_response(project_rows(rows, ROOM_FIELDS, names), next_cursor, limit)
+        rooms, next_cursor = keyset_page(RoomSerializer.load(Room.query.filter(*conditions)), [Room.id], limit, after)
+    except ListArgsError as e:
+        return jsonify({'error': str(e)}), 400
+    return list_response(RoomSerializer.dump_many(rooms), next_cursor, limit)
 
 # API endpoints for room types
 @core_bp.route('/api/room-types')
 @login_required  
 def api_room_types():
+    try:
+        names = requested_fields(request.args, ROOM_TYPE_FIELDS)
+    except ListArgsError as e:
+        return jsonify({'error': str(e)}), 400
+    if names:
+        rows = projection_query(RoomType, ROOM_TYPE_FIELDS, names).order_by(RoomType.id).all()
+        return jsonify(project_rows(rows, ROOM_TYPE_FIELDS, names))
     room_types = RoomType.query.all()
     return jsonify([{'id':rt.id,'name':rt.name,'description':rt.description,'base_price':float(rt.base_price)} for rt in room_types])
 
@@ -67,30 +139,114 @@ def api_room_types():
 @core_bp.route('/api/guests')
 @login_required
 def api_guests():
-    guests = Guest.query.all()
-    return jsonify([{'id':g.id,'name':g.name,'email':g.email,'phone':g.phone,'address':g.address} for g in guests])
+    try:
+        limit, after = page_args(request.args)
+        filters = list_filters(request.args)
+        names = requested_fields(request.args, GUEST_FIELDS)
+        conditions = []
+        # Guests have no status or room type; the date range applies to when they were added
+        if filters['start']:
+            conditions.append(Guest.created_at >= filters['start'])
+        if filters['end']:
+            conditions.append(Guest.created_at < filters['end'])
+        if names:
+            rows, next_cursor = keyset_page(projection_query(Guest, GUEST_FIELDS, names, [Guest.id]).filter(*conditions),
+                                            [Guest.id], limit, after)
+            return list_response(project_rows(rows, GUEST_FIELDS, names), next_cursor, limit)
+        guests, next_cursor = keyset_page(Guest.query.filter(*conditions), [Guest.id], limit, after)
+    except ListArgsError as e:
+        return jsonify({'error': str(e)}), 400
+    return list_response([{'id':g.id,'name':g.name,'email':g.email,'phone':g.phone,'address':g.address} for g in guests],
+                         next_cursor, limit)
 
 # API endpoints for reservations
 @core_bp.route('/api/reservations')
 @login_required
 def api_reservations():
-    reservations = Reservation.query.all()
-    return jsonify([{
-        'id':r.id,
-        'guest_name':r.guest.name if r.guest else 'N/A',
-        'room_number':r.room.number if r.room else 'N/A',
-        'check_in':r.check_in.isoformat() if r.check_in else None,
-        'check_out':r.check_out.isoformat() if r.check_out else None,
-        'status':r.status,
-        'total_price':float(r.total_price)
-    } for r in reservations])
+    try:
+        limit, after = page_args(request.args)
+        filters = list_filters(request.args)
+        names = requested_fields(request.args, RESERVATION_FIELDS)
+    except ListArgsError as e:
+        return jsonify({'error': str(e)}), 400
+    conditions = []
+    if filters['status']:
+        conditions.append(Reservation.status.in_(filters['status']))
+    if filters['room_type_id']:
+        conditions.append(Reservation.room_type_id == filters['room_type_id'])
+    # start/end select stays with a night in [start, end)
+    if filters['start']:
+        conditions.append(Reservation.check_out > filters['start'])
+    if filters['end']:
+        conditions.append(Reservation.check_in < filters['end'])
+    fmt = request.args.get('format')
+    if fmt in EXPORT_FORMATS:
+        rows = stream_query(db.session.query(
+            Reservation.id, Guest.name, Room.number, Reservation.check_in, Reservation.check_out,
+            Reservation.status, Reservation.total_price
+        ).outerjoin(Guest, Reservation.guest_id == Guest.id).outerjoin(Room, Reservation.room_id == Room.id)
+            .filter(*conditions).order_by(Reservation.id))
+        return export_response(({
+            'id':r.id,
+            'guest_name':r[1] or 'N/A',
+            'room_number':r[2] or 'N/A',
+            'check_in':r.check_in.isoformat() if r.check_in else None,
+            'check_out':r.check_out.isoformat() if r.check_out else None,
+            'status':r.status,
+            'total_price':float(r.total_price)
+        } for r in rows), ['id','guest_name','room_number','check_in','check_out','status','total_price'], fmt, 'reservations')
+    try:
+        if names:
+            rows, next_cursor = keyset_page(
+                projection_query(Reservation, RESERVATION_FIELDS, names, [Reservation.id]).filter(*conditions),
+                [Reservation.id], limit, after)
+            return list_response(project_rows(rows, RESERVATION_FIELDS, names), next_cursor, limit)
+        reservations, next_cursor = keyset_page(ReservationSerializer.load(Reservation.query.filter(*conditions)),
+                                                [Reservation.id], limit, after)
+    except ListArgsError as e:
+        return jsonify({'error': str(e)}), 400
+    return list_response(ReservationSerializer.dump_many(reservations), next_cursor, limit)
+
+# Free rooms per room type for each night of [start, end)
+@core_bp.route('/api/availability')
+@login_required
+def api_availability():
+    try:
+        start = datetime.strptime(request.args.get('start', date.today().isoformat()), '%Y-%m-%d').date()
+        end = datetime.strptime(request.args.get('end', (start + timedelta(days=30)).isoformat()), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    if not 0 < (end - start).days <= MAX_CALENDAR_NIGHTS:
+        return jsonify({'error': f'end must be after start and at most {MAX_CALENDAR_NIGHTS} nights later'}), 400
+    return jsonify({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'nights': [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days)],
+        'room_types': availability_calendar(start, end)
+    })
 
 # API endpoints for services
 @core_bp.route('/api/services')
 @login_required
 def api_services():
-    services = Service.query.all()
-    return jsonify([{'id':s.id,'name':s.name,'type':s.type,'price':float(s.price),'status':s.status,'description':s.description} for s in services])
+    try:
+        limit, after = page_args(request.args)
+        filters = list_filters(request.args)
+        names = requested_fields(request.args, SERVICE_FIELDS)
+        conditions = []
+        if filters['status']:
+            conditions.append(Service.status.in_(filters['status']))
+        if request.args.get('type'):
+            conditions.append(Service.type == request.args['type'])
+        if names:
+            rows, next_cursor = keyset_page(projection_query(Service, SERVICE_FIELDS, names, [Service.id]).filter(*conditions),
+                                            [Service.id], limit, after)
+            return list_response(project_rows(rows, SERVICE_FIELDS, names), next_cursor, limit)
+        services, next_cursor = keyset_page(Service.query.filter(*conditions), [Service.id], limit, after)
+    except ListArgsError as e:
+        return jsonify({'error': str(e)}), 400
+    return list_response([{'id':s.id,'name':s.name,'type':s.type,'price':float(s.price),'status':s.status,'description':s.description} for s in services],
+                         next_cursor, limit)
 
 # POST endpoints for creating new records
 @core_bp.route('/api/room-types', methods=['POST'])
@@ -143,6 +299,7 @@ def create_guest():
     return jsonify({'success': True, 'id': guest.id})
 
 @core_bp.route('/api/reservations', methods=['POST'])
+@query_budget.allow(RESERVATION_WRITE_BUDGET)
 @login_required
 def create_reservation():
     data = request.get_json()
@@ -159,7 +316,11 @@ def create_reservation():
     check_in = datetime.strptime(data['check_in'], '%Y-%m-%d').date()
     check_out = datetime.strptime(data['check_out'], '%Y-%m-%d').date()
     nights = (check_out - check_in).days
-    total_price = float(room_type.base_price) * nights
+    if nights <= 0:
+        return jsonify({'error': 'Check-out must be after check-in'}), 400
+    status = data.get('status', 'confirmed')
+    # The inventory claim made when the reservation is flushed decides availability
+    stay = quote(room_type.id, check_in, check_out)
     
     reservation = Reservation(
         guest_id=int(data['guest_id']),
@@ -167,10 +328,18 @@ def create_reservation():
         check_in=check_in,
         check_out=check_out,
         num_guests=int(data['num_guests']),
-        total_price=total_price,
-        status=data.get('status', 'confirmed')
+        total_price=stay['total'],
+        status=status
     )
     db.session.add(reservation)
+    try:
+        db.session.flush()
+        sync_nights(reservation, stay['nightly'])
+    except SoldOut:
+        db.session.rollback()
+        return jsonify({'error': 'No rooms available for the selected dates'}), 409
+    guest = Guest.query.get(reservation.guest_id)
+    record_activity('reservation', f'New reservation for {guest.name if guest else "N/A"}', reservation.id)
     db.session.commit()
     return jsonify({'success': True, 'id': reservation.id})
 
@@ -212,6 +381,7 @@ def update_guest(guest_id):
     return jsonify({'success': True})
 
 @core_bp.route('/api/reservations/<int:reservation_id>', methods=['PUT'])
+@query_budget.allow(RESERVATION_WRITE_BUDGET)
 @login_required
 def update_reservation(reservation_id):
     reservation = Reservation.query.get_or_404(reservation_id)
@@ -220,6 +390,9 @@ def update_reservation(reservation_id):
     if data.get('guest_id'):
         reservation.guest_id = int(data['guest_id'])
     if data.get('room_type_id'):
+        if not RoomType.query.get(data['room_type_id']):
+            db.session.rollback()
+            return jsonify({'error': 'Invalid room type'}), 400
         reservation.room_type_id = int(data['room_type_id'])
     if data.get('check_in'):
         from datetime import datetime
@@ -229,17 +402,25 @@ def update_reservation(reservation_id):
         reservation.check_out = datetime.strptime(data['check_out'], '%Y-%m-%d').date()
     if data.get('num_guests'):
         reservation.num_guests = int(data['num_guests'])
-    if data.get('status'):
+    if data.get('status') and data['status'] != reservation.status:
         reservation.status = data['status']
-    
-    # Recalculate total price if dates or room type changed
-    if data.get('room_type_id') or data.get('check_in') or data.get('check_out'):
-        room_type = RoomType.query.get(reservation.room_type_id)
-        if room_type:
-            nights = (reservation.check_out - reservation.check_in).days
-            reservation.total_price = float(room_type.base_price) * nights
-    
-    db.session.commit()
+        record_activity('reservation_status', f'Reservation #{reservation.id} {reservation.status}', reservation.id)
+    
+    if reservation.check_out <= reservation.check_in:
+        db.session.rollback()
+        return jsonify({'error': 'Check-out must be after check-in'}), 400
+    try:
+        # Reprice and rebuild the nights only if dates or room type changed
+        if data.get('room_type_id') or data.get('check_in') or data.get('check_out'):
+            stay = quote(reservation.room_type_id, reservation.check_in, reservation.check_out)
+            reservation.total_price = stay['total']
+            sync_nights(reservation, stay['nightly'])
+        else:
+            restamp_nights(reservation)
+        db.session.commit()
+    except SoldOut:
+        db.session.rollback()
+        return jsonify({'error': 'No rooms available for the selected dates'}), 409
     return jsonify({'success': True})
 
 @core_bp.route('/api/rooms/<int:room_id>', methods=['PUT'])
@@ -252,8 +433,9 @@ def update_room(room_id):
         room.number = data['number']
     if data.get('room_type_id'):
         room.room_type_id = int(data['room_type_id'])
-    if data.get('status'):
+    if data.get('status') and data['status'] != room.status:
         room.status = data['status']
+        record_activity('room_status', f'Room {room.number} marked {room.status}', room.id)
     
     db.session.commit()
     return jsonify({'success': True})
@@ -294,6 +476,7 @@ def delete_guest(guest_id):
     return jsonify({'success': True})
 
 @core_bp.route('/api/reservations/<int:reservation_id>', methods=['DELETE'])
+@query_budget.allow(RESERVATION_WRITE_BUDGET)
 @login_required
 def delete_reservation(reservation_id):
     reservation = Reservation.query.get_or_404(reservation_id)
@@ -303,30 +486,68 @@ def delete_reservation(reservation_id):
     if invoices > 0:
         return jsonify({'error': 'Cannot delete reservation with existing invoices'}), 400
     
+    record_activity('reservation_status', f'Reservation #{reservation.id} deleted', reservation.id)
     db.session.delete(reservation)
     db.session.commit()
     return jsonify({'success': True})
 
-@core_bp.route('/api/invoices/<int:invoice_id>')
+# Group bookings: one transaction, per-entry results
+@core_bp.route('/api/reservations/bulk', methods=['POST'])
+# Inserts and inventory claims grow with the block, which MAX_BULK_ITEMS bounds
+@query_budget.allow(None)
 @login_required
-def view_invoice(invoice_id):
-    invoice = Invoice.query.get_or_404(invoice_id)
+def create_reservations_bulk():
+    data = request.get_json(silent=True) or {}
+    entries = data.get('reservations')
+    mode = data.get('mode', 'all_or_nothing')
+    if not isinstance(entries, list) or not entries:
+        return jsonify({'error': 'reservations must be a non-empty list'}), 400
+    if len(entries) > MAX_BULK_ITEMS:
+        return jsonify({'error': f'At most {MAX_BULK_ITEMS} reservations per request'}), 400
+    if mode not in BULK_MODES:
+        return jsonify({'error': f'mode must be one of {", ".join(BULK_MODES)}'}), 400
+    results, created = book_block(entries, mode)
+    if created:
+        record_activity('reservation', f'Group booking of {len(created)} reservations')
+        db.session.commit()
+    else:
+        db.session.rollback()
+    booked = sum(result['success'] for result in results)
+    if booked:
+        status = 200 if booked == len(results) else 207
+    else:
+        # 409 only when rooms ran out; a block rejected for invalid entries is a 400
+        status = 409 if any(result.get('error') == SOLD_OUT for result in results) else 400
+    return jsonify({'success': booked == len(results), 'mode': mode, 'booked': booked, 'results': results}), status
+
+# Assign rooms to every unassigned reservation arriving in the window
+@core_bp.route('/api/reservations/assign-rooms', methods=['POST'])
+@login_required
+def assign_reservation_rooms():
+    data = request.get_json(silent=True) or {}
+    try:
+        start = datetime.strptime(data.get('start', date.today().isoformat()), '%Y-%m-%d').date()
+        end = datetime.strptime(data.get('end', start.isoformat()), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+    dry_run = bool(data.get('dry_run'))
+    assigned, unplaced = assign_rooms(start, end, dry_run=dry_run)
+    if assigned and not dry_run:
+        record_activity('room_assignment', f'Rooms assigned to {len(assigned)} reservations arriving {start.isoformat()} to {end.isoformat()}')
+        db.session.commit()
     return jsonify({
-        'id': invoice.id,
-        'reservation_id': invoice.reservation_id,
-        'guest_name': invoice.reservation.guest.name,
-        'room_number': invoice.reservation.room.number if invoice.reservation.room else 'TBD',
-        'room_type': invoice.reservation.room_type.name,
-        'check_in': invoice.reservation.check_in.strftime('%Y-%m-%d'),
-        'check_out': invoice.reservation.check_out.strftime('%Y-%m-%d'),
-        'subtotal': float(invoice.subtotal),
-        'tax': float(invoice.tax),
-        'total': float(invoice.total),
-        'status': invoice.status,
-        'created_at': invoice.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-        'services': [{'name': s.name, 'price': float(s.price)} for s in invoice.reservation.services] if hasattr(invoice.reservation, 'services') else []
+        'success': True,
+        'dry_run': dry_run,
+        'assigned': [{'reservation_id': reservation_id, 'room_id': room_id} for reservation_id, room_id in assigned.items()],
+        'unassigned': unplaced
     })
 
+@core_bp.route('/api/invoices/<int:invoice_id>')
+@login_required
+def view_invoice(invoice_id):
+    invoice = InvoiceDetailSerializer.load(Invoice.query.filter_by(id=invoice_id)).first_or_404()
+    return jsonify(InvoiceDetailSerializer.dump(invoice))
+
 @core_bp.route('/api/invoices/<int:invoice_id>/payment', methods=['POST'])
 @login_required
 def process_payment(invoice_id):
@@ -363,6 +584,7 @@ def process_payment(invoice_id):
     elif total_payments > 0:
         invoice.status = 'partial'
     
+    record_activity('payment', f'Payment received - ${amount:.2f}', invoice_id)
     db.session.commit()
     return jsonify({'success': True, 'payment_id': payment.id, 'new_status': invoice.status})
 
@@ -382,68 +604,32 @@ def get_payments(invoice_id):
 @core_bp.route('/api/dashboard/stats')
 @login_required
 def dashboard_stats():
-    from datetime import date
-    total_rooms = Room.query.count()
-    occupied = Reservation.query.filter(
-        Reservation.status.in_(['confirmed','checked-in']), 
-        Reservation.check_in <= date.today(), 
-        Reservation.check_out > date.today()
-    ).count()
-    maintenance = Room.query.filter_by(status='maintenance').count()
-    available = total_rooms - occupied - maintenance
-    
-    # Calculate revenue breakdown by room type
-    revenue_data = db.session.query(
-        RoomType.name,
-        db.func.sum(Reservation.total_price).label('revenue')
-    ).join(Reservation).group_by(RoomType.name).all()
-    
-    revenue_breakdown = [{'room_type': r.name, 'revenue': float(r.revenue or 0)} for r in revenue_data]
-    
-    return jsonify({
-        'total_rooms': total_rooms,
-        'occupied_rooms': occupied,
-        'available_rooms': available,
-        'maintenance_rooms': maintenance,
-        'revenue_breakdown': revenue_breakdown
-    })
+    return jsonify(dashboard_snapshot())
+
+# Live room counters and their reconcile drift, for monitoring
+@core_bp.route('/api/dashboard/room-state')
+@login_required
+def room_state():
+    room_counters.counts()
+    return jsonify(room_counters.metrics())
+
+# Live dashboard push channel (Server-Sent Events)
+@core_bp.route('/api/dashboard/stream')
+@login_required
+def dashboard_stream():
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    events = dashboard_events(last_event_id, heartbeat=current_app.config.get('DASHBOARD_STREAM_HEARTBEAT', 15))
+    return Response(stream_with_context(events), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 # Recent activity API
 @core_bp.route('/api/dashboard/activity')
 @login_required
 def recent_activity():
-    from datetime import datetime, timedelta
-    
-    # Get recent reservations, payments, and room status changes
-    recent_reservations = Reservation.query.filter(
-        Reservation.created_at >= datetime.utcnow() - timedelta(hours=24)
-    ).order_by(Reservation.created_at.desc()).limit(5).all()
-    
-    recent_payments = Payment.query.filter(
-        Payment.paid_at >= datetime.utcnow() - timedelta(hours=24)
-    ).order_by(Payment.paid_at.desc()).limit(5).all()
-    
-    activities = []
-    
-    for res in recent_reservations:
-        activities.append({
-            'type': 'reservation',
-            'icon': '🏨',
-            'text': f'New reservation for {res.guest.name}',
-            'time': res.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        })
-    
-    for payment in recent_payments:
-        activities.append({
-            'type': 'payment',
-            'icon': '💳',
-            'text': f'Payment received - ${float(payment.amount):.2f}',
-            'time': payment.paid_at.strftime('%Y-%m-%d %H:%M:%S')
-        })
-    
-    # Sort by time and return latest 10
-    activities.sort(key=lambda x: x['time'], reverse=True)
-    return jsonify(activities[:10])
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    since = request.args.get('since', type=int)
+    events = events_since(since, limit) if since is not None else recent_events(limit)
+    return jsonify([serialize_event(e) for e in events])
 
 # Social media simulation API (for demo purposes)
 @core_bp.route('/api/dashboard/social')
@@ -0,0 +1,120 @@
+from flask import Blueprint, jsonify, request
+from flask_login import login_required
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from .. import db
+from ..models.core import RoomType
+from ..models.pricing import RateRule
+from ..services.pricing import RULE_KINDS, quote, quote_all
+
+pricing_bp = Blueprint('pricing', __name__)
+
+def serialize_quote(stay):
+    return dict(stay, nightly=[float(rate) for rate in stay['nightly']], total=float(stay['total']))
+
+def serialize_rule(rule):
+    return {
+        'id': rule.id,
+        'name': rule.name,
+        'kind': rule.kind,
+        'room_type_id': rule.room_type_id,
+        'start_date': rule.start_date.isoformat() if rule.start_date else None,
+        'end_date': rule.end_date.isoformat() if rule.end_date else None,
+        'days_of_week': rule.days_of_week,
+        'min_nights': rule.min_nights,
+        'min_occupancy': float(rule.min_occupancy) if rule.min_occupancy is not None else None,
+        'percent': float(rule.percent),
+        'active': rule.active
+    }
+
+def apply_rule_fields(rule, data):
+    """Copy request fields onto a rule; returns an error message or None."""
+    try:
+        for field in ('name', 'kind', 'days_of_week'):
+            if field in data:
+                setattr(rule, field, data[field])
+        for field in ('start_date', 'end_date'):
+            if field in data:
+                setattr(rule, field, datetime.strptime(data[field], '%Y-%m-%d').date() if data[field] else None)
+        if 'room_type_id' in data:
+            rule.room_type_id = int(data['room_type_id']) if data['room_type_id'] else None
+        if 'min_nights' in data:
+            rule.min_nights = int(data['min_nights']) if data['min_nights'] else None
+        if 'min_occupancy' in data:
+            rule.min_occupancy = Decimal(str(data['min_occupancy'])) if data['min_occupancy'] is not None else None
+        if 'percent' in data:
+            rule.percent = Decimal(str(data['percent']))
+        if 'active' in data:
+            rule.active = bool(data['active'])
+        if rule.days_of_week:
+            if not all(0 <= int(day) <= 6 for day in rule.days_of_week.split(',')):
+                return 'days_of_week must be comma-separated numbers 0 (Mon) to 6 (Sun)'
+    except (TypeError, ValueError, InvalidOperation):
+        return 'Invalid rule fields'
+    if not rule.name or rule.kind not in RULE_KINDS or rule.percent is None:
+        return f'name, percent and kind ({", ".join(RULE_KINDS)}) are required'
+    if rule.kind == 'season' and not (rule.start_date and rule.end_date):
+        return 'Season rules need start_date and end_date'
+    if rule.kind == 'day_of_week' and not rule.days_of_week:
+        return 'Day-of-week rules need days_of_week'
+    if rule.kind == 'length_of_stay' and not rule.min_nights:
+        return 'Length-of-stay rules need min_nights'
+    if rule.kind == 'occupancy' and rule.min_occupancy is None:
+        return 'Occupancy rules need min_occupancy'
+    if rule.room_type_id and not RoomType.query.get(rule.room_type_id):
+        return 'Invalid room type'
+    return None
+
+# Price a stay for one room type, or for every room type when room_type_id is omitted
+@pricing_bp.route('/api/rates/quote')
+@login_required
+def rate_quote():
+    try:
+        check_in = datetime.strptime(request.args.get('check_in', ''), '%Y-%m-%d').date()
+        check_out = datetime.strptime(request.args.get('check_out', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'check_in and check_out must be YYYY-MM-DD'}), 400
+    if check_out <= check_in:
+        return jsonify({'error': 'Check-out must be after check-in'}), 400
+    room_type_id = request.args.get('room_type_id', type=int)
+    if room_type_id is None:
+        return jsonify([serialize_quote(stay) for stay in quote_all(check_in, check_out)])
+    stay = quote(room_type_id, check_in, check_out)
+    if stay is None:
+        return jsonify({'error': 'Invalid room type'}), 404
+    return jsonify(serialize_quote(stay))
+
+@pricing_bp.route('/api/rate-rules')
+@login_required
+def list_rate_rules():
+    return jsonify([serialize_rule(rule) for rule in RateRule.query.order_by(RateRule.id).all()])
+
+@pricing_bp.route('/api/rate-rules', methods=['POST'])
+@login_required
+def create_rate_rule():
+    rule = RateRule(active=True)
+    error = apply_rule_fields(rule, request.get_json() or {})
+    if error:
+        return jsonify({'error': error}), 400
+    db.session.add(rule)
+    db.session.commit()
+    return jsonify({'success': True, 'id': rule.id})
+
+@pricing_bp.route('/api/rate-rules/<int:rule_id>', methods=['PUT'])
+@login_required
+def update_rate_rule(rule_id):
+    rule = RateRule.query.get_or_404(rule_id)
+    error = apply_rule_fields(rule, request.get_json() or {})
+    if error:
+        db.session.rollback()
+        return jsonify({'error': error}), 400
+    db.session.commit()
+    return jsonify({'success': True})
+
+@pricing_bp.route('/api/rate-rules/<int:rule_id>', methods=['DELETE'])
+@login_required
+def delete_rate_rule(rule_id):
+    rule = RateRule.query.get_or_404(rule_id)
+    db.session.delete(rule)
+    db.session.commit()
+    return jsonify({'success': True})
@@ -1,12 +1,33 @@
-from flask import Blueprint, jsonify, request, render_template
+from flask import Blueprint, jsonify, request, render_template, current_app
 from flask_login import login_required
 from datetime import datetime, timedelta, date
 from sqlalchemy import func
 from .. import db
 from ..models.core import Reservation, Room
+from ..services.occupancy import room_type_occupancy
+from ..services.rollups import daily_totals, rollup_ready, room_type_totals
+from ..services.nights import nightly_performance
+from ..services.analytics import summarize
+from ..services.export import EXPORT_FORMATS, export_response
+from ..services.pace import pace as booking_pace
+from ..services.cache import memoize_report, report_cache
+from ..services.pagination import ListArgsError
 
 reports_bp = Blueprint('reports', __name__)
 
+def report_dates(default_start, default_end):
+    """(start, end, s, e): the start_date/end_date args as given and parsed; ListArgsError if malformed."""
+    start = request.args.get('start_date', default_start.isoformat())
+    end = request.args.get('end_date', default_end.isoformat())
+    try:
+        return start, end, datetime.strptime(start,'%Y-%m-%d').date(), datetime.strptime(end,'%Y-%m-%d').date()
+    except ValueError:
+        raise ListArgsError('start_date and end_date must be YYYY-MM-DD')
+
+def use_rollup():
+    # A database upgraded without `flask rebuild-rollups` is read directly until the rollup is built
+    return current_app.config.get('REPORTS_BACKEND', 'rollup') == 'rollup' and rollup_ready()
+
 # Page routes
 @reports_bp.route('/reports')
 @login_required
@@ -16,33 +37,135 @@ def reports_page():
 # API routes
 @reports_bp.route('/api/reports/occupancy')
 @login_required
+@memoize_report
 def occupancy():
     start = request.args.get('start_date', (date.today()-timedelta(days=7)).isoformat())
     end = request.args.get('end_date', date.today().isoformat())
     s = datetime.strptime(start,'%Y-%m-%d').date()
     e = datetime.strptime(end,'%Y-%m-%d').date()
     total_rooms = Room.query.count()
+    if use_rollup():
+        occupied_by_day = [totals['occupied'] for _, totals in daily_totals(s, e)]
+        sold = {room_type_id: totals['occupied'] for room_type_id, totals in room_type_totals(s, e).items()}
+    else:
+        summary = summarize(s, e)
+        occupied_by_day = summary['occupied']
+        sold = summary['room_type_nights']
     data = []
-    cur = s
-    while cur <= e:
-        occupied = Reservation.query.filter(Reservation.status.in_(['confirmed','checked-in']), Reservation.check_in <= cur, Reservation.check_out > cur).count()
+    for offset, occupied in enumerate(occupied_by_day):
+        cur = s + timedelta(days=offset)
         rate = round((occupied/total_rooms*100),2) if total_rooms else 0
         data.append({'date': cur.isoformat(),'occupied': occupied,'available': total_rooms-occupied,'rate': rate})
-        cur += timedelta(days=1)
-    return jsonify({'start_date': start,'end_date': end,'daily': data,'total_rooms': total_rooms})
+    fmt = request.args.get('format')
+    if fmt in EXPORT_FORMATS:
+        return export_response(data, ['date','occupied','available','rate'], fmt, 'occupancy')
+    return jsonify({'start_date': start,'end_date': end,'daily': data,'total_rooms': total_rooms,'room_types': room_type_occupancy(s, e, sold)})
 
 @reports_bp.route('/revenue')
 @login_required
+@memoize_report
 def revenue():
     start = request.args.get('start_date', (date.today()-timedelta(days=30)).isoformat())
     end = request.args.get('end_date', date.today().isoformat())
     s = datetime.strptime(start,'%Y-%m-%d').date()
     e = datetime.strptime(end,'%Y-%m-%d').date()
-    cur = s
-    daily = []
-    while cur <= e:
-        total = db.session.query(func.coalesce(func.sum(Reservation.total_price),0)).filter(Reservation.check_in==cur, Reservation.status!='cancelled').scalar()
-        daily.append({'date': cur.isoformat(),'revenue': float(total)})
-        cur += timedelta(days=1)
+    if use_rollup():
+        revenue_by_day = [totals['revenue'] for _, totals in daily_totals(s, e)]
+    else:
+        revenue_by_day = summarize(s, e)['revenue']
+    daily = [{'date': (s + timedelta(days=offset)).isoformat(),'revenue': total} for offset, total in enumerate(revenue_by_day)]
+    fmt = request.args.get('format')
+    if fmt in EXPORT_FORMATS:
+        return export_response(daily, ['date','revenue'], fmt, 'revenue')
     total_rev = sum(d['revenue'] for d in daily)
     return jsonify({'start_date': start,'end_date': end,'total_revenue': total_rev,'daily': daily})
+
+@reports_bp.route('/api/reports/performance')
+@login_required
+@memoize_report
+def performance():
+    try:
+        start, end, s, e = report_dates(date.today()-timedelta(days=30), date.today())
+    except ListArgsError as error:
+        return jsonify({'error': str(error)}), 400
+    total_rooms = Room.query.count()
+    daily = []
+    for cur, sold, revenue in nightly_performance(s, e):
+        daily.append({
+            'date': cur.isoformat(),
+            'rooms_sold': sold,
+            'room_revenue': revenue,
+            'adr': round(revenue/sold,2) if sold else 0,
+            'revpar': round(revenue/total_rooms,2) if total_rooms else 0
+        })
+    fmt = request.args.get('format')
+    if fmt in EXPORT_FORMATS:
+        return export_response(daily, ['date','rooms_sold','room_revenue','adr','revpar'], fmt, 'performance')
+    sold_total = sum(d['rooms_sold'] for d in daily)
+    revenue_total = sum(d['room_revenue'] for d in daily)
+    available_total = total_rooms * len(daily)
+    return jsonify({
+        'start_date': start,
+        'end_date': end,
+        'total_rooms': total_rooms,
+        'rooms_sold': sold_total,
+        'room_revenue': revenue_total,
+        'adr': round(revenue_total/sold_total,2) if sold_total else 0,
+        'revpar': round(revenue_total/available_total,2) if available_total else 0,
+        'daily': daily
+    })
+
+@reports_bp.route('/api/reports/length-of-stay')
+@login_required
+@memoize_report
+def length_of_stay():
+    try:
+        start, end, s, e = report_dates(date.today()-timedelta(days=30), date.today())
+    except ListArgsError as error:
+        return jsonify({'error': str(error)}), 400
+    summary = summarize(s, e)
+    stays = sum(summary['length_of_stay'].values())
+    nights = sum(n*c for n, c in summary['length_of_stay'].items())
+    return jsonify({
+        'start_date': start,
+        'end_date': end,
+        'arrivals': stays,
+        'average_nights': round(nights/stays,2) if stays else 0,
+        'distribution': [{'nights': n,'count': c} for n, c in summary['length_of_stay'].items()],
+        'room_type_revenue': [{'room_type_id': t,'revenue': r} for t, r in sorted(summary['room_type_revenue'].items())]
+    })
+
+@reports_bp.route('/api/reports/pace')
+@login_required
+@memoize_report
+def pace():
+    try:
+        start, end, s, e = report_dates(date.today(), date.today()+timedelta(days=365))
+    except ListArgsError as error:
+        return jsonify({'error': str(error)}), 400
+    days_before = request.args.get('days_before', 30, type=int)
+    current, last_year = booking_pace(s, e, days_before)
+    daily = []
+    for offset, (otb, ly) in enumerate(zip(current, last_year)):
+        daily.append({
+            'date': (s + timedelta(days=offset)).isoformat(),
+            'on_the_books': otb,
+            'last_year': ly,
+            'variance': otb - ly
+        })
+    fmt = request.args.get('format')
+    if fmt in EXPORT_FORMATS:
+        return export_response(daily, ['date','on_the_books','last_year','variance'], fmt, 'pace')
+    return jsonify({
+        'start_date': start,
+        'end_date': end,
+        'days_before': days_before,
+        'on_the_books': sum(current),
+        'last_year': sum(last_year),
+        'daily': daily
+    })
+
+@reports_bp.route('/api/reports/cache-stats')
+@login_required
+def cache_stats():
+    return jsonify(report_cache.stats())
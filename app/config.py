@@ -6,3 +6,16 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL','sqlite:///hotel.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     REMEMBER_COOKIE_DURATION = timedelta(days=7)
+    # Report source: 'rollup' (daily_stats table), 'numpy' (vectorized, needs numpy) or 'python'
+    REPORTS_BACKEND = os.environ.get('REPORTS_BACKEND','rollup')
+    REPORT_CACHE_MAX_ENTRIES = int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', 256))
+    REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    REPORT_CACHE_TTL = float(os.environ.get('REPORT_CACHE_TTL', 300))
+    DASHBOARD_SNAPSHOT_TTL = float(os.environ.get('DASHBOARD_SNAPSHOT_TTL', 5))
+    DASHBOARD_STREAM_HEARTBEAT = float(os.environ.get('DASHBOARD_STREAM_HEARTBEAT', 15))
+    # Seconds between activity_event polls, one poller per process; picks up events written by other workers
+    DASHBOARD_STREAM_POLL = float(os.environ.get('DASHBOARD_STREAM_POLL', 2))
+    ROOM_STATE_RECONCILE_INTERVAL = float(os.environ.get('ROOM_STATE_RECONCILE_INTERVAL', 300))
+    PRICING_CACHE_TTL = float(os.environ.get('PRICING_CACHE_TTL', 300))
+    # Fail (under TESTING) or log requests issuing more SQL statements than this; unset disables counting
+    QUERY_BUDGET = int(os.environ['QUERY_BUDGET']) if os.environ.get('QUERY_BUDGET') else None
@@ -1,6 +1,9 @@
 from datetime import datetime, date
 from .user import User
-from .core import Guest, RoomType, Room, Reservation, Service
+from .core import Guest, RoomType, Room, Reservation, ReservationNight, RoomInventory, Service
 from .billing import Invoice, Payment
 from .setting import Setting
-__all__ = ['User','Guest','RoomType','Room','Reservation','Service','Invoice','Payment','Setting']
+from .stats import DailyStat, RollupDirtyRange, RollupWatermark, RoomTypeRevenue, RoomTypeRevenueDay, DataVersion
+from .activity import ActivityEvent
+from .pricing import RateRule
+__all__ = ['User','Guest','RoomType','Room','Reservation','ReservationNight','RoomInventory','Service','Invoice','Payment','Setting','DailyStat','RollupDirtyRange','RollupWatermark','RoomTypeRevenue','RoomTypeRevenueDay','DataVersion','ActivityEvent','RateRule']
@@ -0,0 +1,12 @@
+from datetime import datetime
+from .. import db
+
+class ActivityEvent(db.Model):
+    # Append-only feed; text is rendered at write time so reads never join
+    __tablename__ = 'activity_event'
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(30), nullable=False)
+    icon = db.Column(db.String(10))
+    text = db.Column(db.String(255), nullable=False)
+    ref_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
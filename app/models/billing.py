@@ -12,6 +12,10 @@ class Invoice(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     reservation = db.relationship('Reservation', back_populates='invoices')
     payments = db.relationship('Payment', back_populates='invoice')
+    # Newest-first keyset pages of the invoice list
+    __table_args__ = (
+        db.Index('ix_invoice_created_at_id', 'created_at', 'id'),
+    )
 
 class Payment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
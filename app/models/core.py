@@ -11,6 +11,10 @@ class Guest(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     reservations = db.relationship('Reservation', back_populates='guest')
+    # Lets ?fields=id,name dropdown lists read the index alone
+    __table_args__ = (
+        db.Index('ix_guest_id_name', 'id', 'name'),
+    )
 
 class RoomType(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -19,6 +23,9 @@ class RoomType(db.Model):
     base_price = db.Column(db.Numeric(10,2), nullable=False)
     amenities = db.Column(db.Text)  # JSON string
     rooms = db.relationship('Room', back_populates='room_type')
+    __table_args__ = (
+        db.Index('ix_room_type_id_name', 'id', 'name'),
+    )
 
 class Room(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -28,6 +35,9 @@ class Room(db.Model):
     notes = db.Column(db.Text)
     room_type = db.relationship('RoomType', back_populates='rooms')
     reservations = db.relationship('Reservation', back_populates='room')
+    __table_args__ = (
+        db.Index('ix_room_type_status', 'room_type_id', 'status'),
+    )
 
 class Reservation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -45,6 +55,39 @@ class Reservation(db.Model):
     room = db.relationship('Room', back_populates='reservations')
     room_type = db.relationship('RoomType')
     invoices = db.relationship('Invoice', back_populates='reservation')
+    nights = db.relationship('ReservationNight', back_populates='reservation', cascade='all, delete-orphan')
+    # Existing databases get these from migrations/versions/a1c3e5f7b902_reservation_hot_path_indexes.py
+    __table_args__ = (
+        # Arrivals and revenue by arrival date (dashboard, pace, room assignment)
+        db.Index('ix_reservation_check_in_status', 'check_in', 'status'),
+        # Covers the overlap filter check_out > start AND check_in <= end AND status IN (...)
+        # and the room_type_id it selects, for occupancy, availability and departures
+        db.Index('ix_reservation_stay_cover', 'check_out', 'check_in', 'status', 'room_type_id'),
+        db.Index('ix_reservation_type_stay', 'room_type_id', 'check_in', 'check_out'),
+        db.Index('ix_reservation_room_stay', 'room_id', 'check_in', 'check_out'),
+        db.Index('ix_reservation_created_at', 'created_at'),
+    )
+
+class ReservationNight(db.Model):
+    # One row per sold night, rebuilt from its Reservation on every write
+    id = db.Column(db.Integer, primary_key=True)
+    reservation_id = db.Column(db.Integer, db.ForeignKey('reservation.id'), nullable=False, index=True)
+    room_type_id = db.Column(db.Integer, db.ForeignKey('room_type.id'), nullable=False)
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'))
+    night = db.Column(db.Date, nullable=False)
+    nightly_rate = db.Column(db.Numeric(10,2), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    reservation = db.relationship('Reservation', back_populates='nights')
+    __table_args__ = (
+        db.Index('ix_reservation_night_night_status', 'night', 'status'),
+        db.Index('ix_reservation_night_type_night', 'room_type_id', 'night'),
+    )
+
+class RoomInventory(db.Model):
+    # Active stays per room type and night; bookings claim a unit with a conditional UPDATE
+    room_type_id = db.Column(db.Integer, db.ForeignKey('room_type.id'), primary_key=True)
+    night = db.Column(db.Date, primary_key=True)
+    booked = db.Column(db.Integer, nullable=False, default=0)
 
 class Service(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -0,0 +1,19 @@
+from datetime import datetime
+from .. import db
+
+class RateRule(db.Model):
+    # kind: season (start_date..end_date), day_of_week (days_of_week, Mon=0, e.g. '4,5'),
+    # length_of_stay (min_nights, whole stay) or occupancy (min_occupancy percent, per night)
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    room_type_id = db.Column(db.Integer, db.ForeignKey('room_type.id'))
+    start_date = db.Column(db.Date)
+    end_date = db.Column(db.Date)
+    days_of_week = db.Column(db.String(20))
+    min_nights = db.Column(db.Integer)
+    min_occupancy = db.Column(db.Numeric(5,2))
+    percent = db.Column(db.Numeric(6,2), nullable=False)
+    active = db.Column(db.Boolean, default=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
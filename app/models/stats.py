@@ -0,0 +1,39 @@
+from datetime import datetime
+from .. import db
+
+class DailyStat(db.Model):
+    __tablename__ = 'daily_stats'
+    day = db.Column(db.Date, primary_key=True)
+    room_type_id = db.Column(db.Integer, db.ForeignKey('room_type.id'), primary_key=True)
+    occupied = db.Column(db.Integer, nullable=False, default=0)
+    arrivals = db.Column(db.Integer, nullable=False, default=0)
+    departures = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12,2), nullable=False, default=0)
+    cancellations = db.Column(db.Integer, nullable=False, default=0)
+
+class RollupDirtyRange(db.Model):
+    # Dates whose daily_stats rows are stale, written in the same transaction as the reservation change
+    id = db.Column(db.Integer, primary_key=True)
+    start = db.Column(db.Date, nullable=False)
+    end = db.Column(db.Date, nullable=False)
+
+class RollupWatermark(db.Model):
+    # Last refresh time; refreshes lock this row so only one folds dirty ranges at a time
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class RoomTypeRevenue(db.Model):
+    # Lifetime non-cancelled revenue per room type, adjusted in the same transaction as each reservation write
+    room_type_id = db.Column(db.Integer, db.ForeignKey('room_type.id'), primary_key=True)
+    revenue = db.Column(db.Numeric(14,2), nullable=False, default=0)
+
+class RoomTypeRevenueDay(db.Model):
+    # Same figure bucketed by arrival date, for month-to-date and trailing windows
+    room_type_id = db.Column(db.Integer, db.ForeignKey('room_type.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    revenue = db.Column(db.Numeric(12,2), nullable=False, default=0)
+
+class DataVersion(db.Model):
+    # Bumped in the writing transaction for each watched model, so every process sees other processes' writes
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,37 @@
+from .. import db
+from ..models.activity import ActivityEvent
+
+ACTIVITY_ICONS = {
+    'reservation': '🏨',
+    'reservation_status': '🛎️',
+    'payment': '💳',
+    'room_status': '🔧',
+    'room_assignment': '🔑',
+    'invoice': '🧾'
+}
+FEED_LIMIT = 10
+
+def record_activity(type, text, ref_id=None):
+    """Append an event to the feed inside the caller's transaction."""
+    event = ActivityEvent(type=type, icon=ACTIVITY_ICONS.get(type, '•'), text=text, ref_id=ref_id)
+    db.session.add(event)
+    return event
+
+def serialize_event(event):
+    return {
+        'id': event.id,
+        'type': event.type,
+        'icon': event.icon,
+        'text': event.text,
+        'time': event.created_at.strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+def recent_events(limit=FEED_LIMIT):
+    return ActivityEvent.query.order_by(ActivityEvent.id.desc()).limit(limit).all()
+
+def events_since(after_id, limit=FEED_LIMIT):
+    """Events newer than after_id, oldest first, for cursor-based catch-up."""
+    return ActivityEvent.query.filter(ActivityEvent.id > after_id).order_by(ActivityEvent.id).limit(limit).all()
+
+def latest_event_id():
+    return db.session.query(db.func.max(ActivityEvent.id)).scalar() or 0
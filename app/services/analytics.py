@@ -0,0 +1,115 @@
+from collections import Counter, defaultdict
+from flask import current_app
+from .. import db
+from ..models.core import Reservation
+from .occupancy import ACTIVE_STATUSES
+
+try:
+    import numpy as np
+except ImportError:  # optional, reports fall back to the pure-Python path
+    np = None
+
+STATUS_CODES = {'confirmed': 0, 'checked-in': 1, 'checked-out': 2, 'cancelled': 3}
+OTHER_STATUS = 4
+ACTIVE_CODES = tuple(STATUS_CODES[s] for s in ACTIVE_STATUSES)
+CANCELLED = STATUS_CODES['cancelled']
+
+def numpy_enabled():
+    return np is not None and current_app.config.get('REPORTS_BACKEND') == 'numpy'
+
+def load_stays(start, end):
+    """Columns of every reservation touching start..end as (check_in, check_out, room_type_id, cents, status) tuples.
+
+    Dates are ordinals relative to start and prices are integer cents, so both
+    backends do exact integer arithmetic and agree to the last digit.
+    """
+    base = start.toordinal()
+    rows = db.session.query(
+        Reservation.check_in, Reservation.check_out, Reservation.room_type_id,
+        Reservation.total_price, Reservation.status
+    ).filter(Reservation.check_in <= end, Reservation.check_out > start)
+    return [(
+        check_in.toordinal() - base,
+        check_out.toordinal() - base,
+        room_type_id,
+        int(round(float(total_price) * 100)),
+        STATUS_CODES.get(status, OTHER_STATUS)
+    ) for check_in, check_out, room_type_id, total_price, status in rows]
+
+def summarize(start, end, vectorized=None):
+    """Daily occupancy and revenue, per-type room-nights and revenue, and length-of-stay counts for start..end."""
+    if vectorized is None:
+        vectorized = numpy_enabled()
+    days = max((end - start).days + 1, 0)
+    stays = load_stays(start, end)
+    if vectorized and np is not None:
+        return _summarize_numpy(stays, days)
+    return _summarize_python(stays, days)
+
+def _summarize_python(stays, days):
+    delta = [0] * (days + 1)
+    revenue = [0] * days
+    arrivals = [0] * days
+    type_nights = defaultdict(int)
+    type_revenue = defaultdict(int)
+    length_of_stay = Counter()
+    for check_in, check_out, room_type_id, cents, status in stays:
+        if status in ACTIVE_CODES:
+            lo = max(check_in, 0)
+            hi = min(check_out, days)
+            if lo < hi:
+                delta[lo] += 1
+                delta[hi] -= 1
+                type_nights[room_type_id] += hi - lo
+        if 0 <= check_in < days and status != CANCELLED:
+            revenue[check_in] += cents
+            arrivals[check_in] += 1
+            type_revenue[room_type_id] += cents
+            length_of_stay[check_out - check_in] += 1
+    occupied = []
+    running = 0
+    for i in range(days):
+        running += delta[i]
+        occupied.append(running)
+    return {
+        'occupied': occupied,
+        'revenue': [c / 100 for c in revenue],
+        'arrivals': arrivals,
+        'room_type_nights': dict(type_nights),
+        'room_type_revenue': {k: v / 100 for k, v in type_revenue.items()},
+        'length_of_stay': dict(sorted(length_of_stay.items()))
+    }
+
+def _summarize_numpy(stays, days):
+    if not stays:
+        return _summarize_python(stays, days)
+    cols = np.array(stays, dtype=np.int64)
+    check_in, check_out, room_type, cents, status = cols.T
+    lo = np.clip(check_in, 0, days)
+    hi = np.clip(check_out, 0, days)
+    active = np.isin(status, ACTIVE_CODES) & (lo < hi)
+    delta = np.zeros(days + 1, dtype=np.int64)
+    np.add.at(delta, lo[active], 1)
+    np.add.at(delta, hi[active], -1)
+    occupied = np.cumsum(delta[:days])
+
+    nights = np.zeros(room_type.max() + 1, dtype=np.int64)
+    np.add.at(nights, room_type[active], (hi - lo)[active])
+
+    arriving = (check_in >= 0) & (check_in < days) & (status != CANCELLED)
+    revenue = np.zeros(days, dtype=np.int64)
+    np.add.at(revenue, check_in[arriving], cents[arriving])
+    arrivals = np.bincount(check_in[arriving], minlength=days)[:days]
+    type_revenue = np.zeros(room_type.max() + 1, dtype=np.int64)
+    np.add.at(type_revenue, room_type[arriving], cents[arriving])
+    type_arrivals = np.bincount(room_type[arriving], minlength=room_type.max() + 1)
+    length_of_stay = np.bincount((check_out - check_in)[arriving])
+
+    return {
+        'occupied': occupied.tolist(),
+        'revenue': [c / 100 for c in revenue.tolist()],
+        'arrivals': arrivals.tolist(),
+        'room_type_nights': {int(t): int(n) for t, n in enumerate(nights) if n},
+        'room_type_revenue': {int(t): int(c) / 100 for t, c in enumerate(type_revenue) if type_arrivals[t]},
+        'length_of_stay': {int(n): int(c) for n, c in enumerate(length_of_stay) if c}
+    }
@@ -0,0 +1,91 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import bindparam, update
+from .. import db
+from ..models.core import Room, Reservation, ReservationNight
+from .changes import mark_changed
+from .occupancy import ACTIVE_STATUSES
+
+def _span(base, check_in, check_out):
+    lo = check_in.toordinal() - base
+    hi = check_out.toordinal() - base
+    return ((1 << (hi - lo)) - 1) << lo if hi > lo else 0
+
+def plan_assignments(start, end):
+    """Pick a room for every unassigned active reservation arriving start..end.
+
+    Per room type, arrivals are placed in check-in order (greedy interval
+    colouring) into a bookable room whose nights are all free, keeping rooms
+    already assigned where they are. A guest continuing from an earlier stay
+    keeps that room; otherwise the room with the shortest idle gap before
+    check-in wins, which leaves long free runs for long stays. Returns
+    ({reservation_id: room_id}, [reservation ids that did not fit]).
+    """
+    pending = db.session.query(
+        Reservation.id, Reservation.room_type_id, Reservation.guest_id, Reservation.check_in, Reservation.check_out
+    ).filter(
+        Reservation.room_id.is_(None), Reservation.status.in_(ACTIVE_STATUSES),
+        Reservation.check_in >= start, Reservation.check_in <= end, Reservation.check_out > Reservation.check_in
+    ).order_by(Reservation.check_in, Reservation.check_out.desc(), Reservation.id).all()
+    if not pending:
+        return {}, []
+    base = start.toordinal()
+    horizon = max(check_out for *_, check_out in pending)
+    rooms = defaultdict(list)
+    for room_id, room_type_id in db.session.query(Room.id, Room.room_type_id).filter(
+            Room.room_type_id.in_({row.room_type_id for row in pending}), Room.status != 'maintenance'
+    ).order_by(Room.number):
+        rooms[room_type_id].append(room_id)
+    masks = defaultdict(int)
+    leaving = {}
+    for room_id, guest_id, check_in, check_out in db.session.query(
+            Reservation.room_id, Reservation.guest_id, Reservation.check_in, Reservation.check_out
+    ).filter(
+        Reservation.room_id.isnot(None), Reservation.status.in_(ACTIVE_STATUSES),
+        Reservation.check_in < horizon, Reservation.check_out >= start
+    ):
+        masks[room_id] |= _span(base, max(check_in, start), check_out)
+        leaving[room_id, check_out] = guest_id
+    assigned, unplaced = {}, []
+    for reservation_id, room_type_id, guest_id, check_in, check_out in pending:
+        window = _span(base, check_in, check_out)
+        before = (1 << (check_in.toordinal() - base)) - 1
+        best = None
+        for room_id in rooms[room_type_id]:
+            mask = masks[room_id]
+            if mask & window:
+                continue
+            if leaving.get((room_id, check_in)) == guest_id:
+                best = room_id
+                break
+            gap = check_in.toordinal() - base - (mask & before).bit_length()
+            if best is None or gap < best_gap:
+                best, best_gap = room_id, gap
+        if best is None:
+            unplaced.append(reservation_id)
+            continue
+        masks[best] |= window
+        leaving[best, check_out] = guest_id
+        assigned[reservation_id] = best
+    return assigned, unplaced
+
+def apply_assignments(assigned):
+    """Write room assignments with two executemany statements in the caller's transaction."""
+    if not assigned:
+        return
+    now = datetime.utcnow()
+    db.session.execute(update(Reservation), [
+        {'id': reservation_id, 'room_id': room_id, 'updated_at': now} for reservation_id, room_id in assigned.items()
+    ])
+    nights = ReservationNight.__table__
+    db.session.execute(
+        nights.update().where(nights.c.reservation_id == bindparam('b_reservation_id')).values(room_id=bindparam('b_room_id')),
+        [{'b_reservation_id': reservation_id, 'b_room_id': room_id} for reservation_id, room_id in assigned.items()]
+    )
+    mark_changed(db.session, 'Reservation')
+
+def assign_rooms(start, end, dry_run=False):
+    assigned, unplaced = plan_assignments(start, end)
+    if not dry_run:
+        apply_assignments(assigned)
+    return assigned, unplaced
@@ -0,0 +1,27 @@
+from sqlalchemy import and_, func
+from .. import db
+from ..models.core import Room, RoomType
+from .inventory import booked_by_night
+
+MAX_CALENDAR_NIGHTS = 366
+
+def availability_calendar(start, end):
+    """Free rooms of every room type for each night of [start, end).
+
+    Booked counts come from the shared room_inventory rows, so every worker
+    sees the same figures as the booking claim.
+    """
+    room_types = db.session.query(RoomType.id, RoomType.name, func.count(Room.id)).outerjoin(
+        Room, and_(Room.room_type_id == RoomType.id, Room.status != 'maintenance')
+    ).group_by(RoomType.id, RoomType.name).order_by(RoomType.name).all()
+    booked = booked_by_night(db.session, [row[0] for row in room_types], start, end)
+    calendar = []
+    for room_type_id, name, room_count in room_types:
+        nights = booked[room_type_id]
+        calendar.append({
+            'room_type_id': room_type_id,
+            'room_type_name': name,
+            'room_count': room_count,
+            'free': [max(room_count - count, 0) for count in nights]
+        })
+    return calendar
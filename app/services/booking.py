@@ -0,0 +1,212 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import func, insert
+from .. import db
+from ..models.core import Guest, Room, RoomType, Reservation, ReservationNight, RoomInventory
+from .changes import mark_changed
+from .inventory import SoldOut, claim, ensure_inventory
+from .occupancy import ACTIVE_STATUSES
+from .pricing import quote, rate_table
+from .revenue import add_revenue, contribution
+from .room_state import occupies, stage_room_deltas
+from .rollups import mark_dirty
+
+BULK_MODES = ('all_or_nothing', 'best_effort')
+MAX_BULK_ITEMS = 500
+SOLD_OUT = 'No rooms available for the selected dates'
+RESERVATION_KEY = ('guest_id', 'room_type_id', 'check_in', 'check_out', 'num_guests', 'status', 'total_price')
+
+def parse_item(item):
+    """Validate one bulk booking entry; returns (fields, None) or (None, error)."""
+    if not isinstance(item, dict):
+        return None, 'Each reservation must be an object'
+    guest = item.get('guest')
+    if not item.get('guest_id') and not (isinstance(guest, dict) and guest.get('name') and guest.get('email')):
+        return None, 'guest_id or guest with name and email is required'
+    if not all(item.get(field) for field in ('room_type_id', 'check_in', 'check_out', 'num_guests')):
+        return None, 'Missing required fields'
+    try:
+        check_in = datetime.strptime(item['check_in'], '%Y-%m-%d').date()
+        check_out = datetime.strptime(item['check_out'], '%Y-%m-%d').date()
+        fields = {
+            'guest_id': int(item['guest_id']) if item.get('guest_id') else None,
+            'guest': guest if not item.get('guest_id') else None,
+            'room_type_id': int(item['room_type_id']),
+            'check_in': check_in,
+            'check_out': check_out,
+            'num_guests': int(item['num_guests']),
+            'status': item.get('status', 'confirmed')
+        }
+    except (TypeError, ValueError):
+        return None, 'Invalid dates or numbers'
+    if check_out <= check_in:
+        return None, 'Check-out must be after check-in'
+    return fields, None
+
+def _remaining(items):
+    """Rooms left per (room_type_id, night) over the span the block touches, two queries per room type."""
+    spans = {}
+    for item in items:
+        lo, hi = spans.get(item['room_type_id'], (item['check_in'], item['check_out']))
+        spans[item['room_type_id']] = (min(lo, item['check_in']), max(hi, item['check_out']))
+    capacity = dict(db.session.query(Room.room_type_id, func.count(Room.id)).filter(
+        Room.room_type_id.in_(list(spans)), Room.status != 'maintenance').group_by(Room.room_type_id))
+    remaining = {}
+    for room_type_id, (lo, hi) in spans.items():
+        ensure_inventory(db.session, room_type_id, lo, hi)
+        booked = dict(db.session.query(RoomInventory.night, RoomInventory.booked).filter(
+            RoomInventory.room_type_id == room_type_id, RoomInventory.night >= lo, RoomInventory.night < hi))
+        for offset in range((hi - lo).days):
+            night = lo + timedelta(days=offset)
+            remaining[room_type_id, night] = capacity.get(room_type_id, 0) - booked.get(night, 0)
+    return remaining
+
+def plan_block(items, best_effort):
+    """Pick which parsed items fit, in request order; returns {index: error} for the ones that don't."""
+    remaining = _remaining([item for item in items.values() if item['status'] in ACTIVE_STATUSES])
+    errors = {}
+    for index, item in items.items():
+        if item['status'] not in ACTIVE_STATUSES:
+            continue
+        nights = [(item['room_type_id'], item['check_in'] + timedelta(days=offset))
+                  for offset in range((item['check_out'] - item['check_in']).days)]
+        if all(remaining[key] > 0 for key in nights):
+            for key in nights:
+                remaining[key] -= 1
+        else:
+            errors[index] = SOLD_OUT
+            if not best_effort:
+                break
+    return errors
+
+def _insert_reservations(rows):
+    """Insert reservation rows with one executemany; returns their ids in row order."""
+    if not db.session.get_bind().dialect.insert_executemany_returning:
+        # No RETURNING for executemany (MySQL): one INSERT per row to learn the ids
+        return [db.session.execute(insert(Reservation), [row]).inserted_primary_key[0] for row in rows]
+    # Asking for RETURNING in parameter order makes some backends fall back to one
+    # INSERT per row, so ids are matched on the inserted values instead; rows with
+    # equal values are interchangeable
+    columns = [getattr(Reservation, name) for name in RESERVATION_KEY]
+    ids = defaultdict(list)
+    for reservation_id, *values in db.session.execute(insert(Reservation).returning(Reservation.id, *columns), rows):
+        ids[tuple(values)].append(reservation_id)
+    return [ids[tuple(row[name] for name in RESERVATION_KEY)].pop() for row in rows]
+
+def insert_block(items):
+    """Insert guests, reservations and nights for the parsed items in the current transaction.
+
+    Each table is written with one executemany, so a block costs the same
+    number of statements whatever its size. These statements bypass the
+    unit of work, so the inventory claim and the aggregates the flush hooks
+    keep are applied here. Returns {index: reservation_id}.
+    """
+    if not items:
+        return {}
+    # One compiled rate table prices the whole block
+    table = rate_table.get(min(item['check_in'] for item in items.values()),
+                           max(item['check_out'] for item in items.values()))
+    emails = {item['guest']['email'] for item in items.values() if item['guest']}
+    guests = dict(db.session.query(Guest.email, Guest.id).filter(Guest.email.in_(emails))) if emails else {}
+    new_guests = {}
+    for item in items.values():
+        if item['guest'] and item['guest']['email'] not in guests:
+            new_guests.setdefault(item['guest']['email'], {
+                'name': item['guest']['name'], 'email': item['guest']['email'],
+                'phone': item['guest'].get('phone', ''), 'address': item['guest'].get('address', '')})
+    if new_guests:
+        db.session.execute(insert(Guest), list(new_guests.values()))
+        guests.update(db.session.query(Guest.email, Guest.id).filter(Guest.email.in_(list(new_guests))))
+    claims, rows, rates = defaultdict(int), [], []
+    for item in items.values():
+        stay = quote(item['room_type_id'], item['check_in'], item['check_out'], table)
+        rows.append({
+            'guest_id': item['guest_id'] or guests[item['guest']['email']],
+            'room_type_id': item['room_type_id'],
+            'check_in': item['check_in'],
+            'check_out': item['check_out'],
+            'num_guests': item['num_guests'],
+            'total_price': stay['total'],
+            'status': item['status']
+        })
+        rates.append(stay['nightly'])
+        if item['status'] in ACTIVE_STATUSES:
+            claims[item['room_type_id'], item['check_in'], item['check_out']] += 1
+    # Same order as the flush hook so overlapping transactions lock rows in the same sequence
+    for stay in sorted(claims):
+        claim(db.session, *stay, quantity=claims[stay])
+    ids = _insert_reservations(rows)
+    nights, revenue, occupied = [], defaultdict(Decimal), 0
+    today = date.today()
+    for reservation_id, row, nightly in zip(ids, rows, rates):
+        nights.extend({
+            'reservation_id': reservation_id, 'room_type_id': row['room_type_id'], 'room_id': None,
+            'night': row['check_in'] + timedelta(days=offset), 'nightly_rate': rate, 'status': row['status']
+        } for offset, rate in enumerate(nightly))
+        counted = contribution(row['status'], row['room_type_id'], row['check_in'], row['total_price'])
+        if counted:
+            revenue[counted[0]] += counted[1]
+        occupied += occupies(row['status'], row['check_in'], row['check_out'], today)
+    db.session.execute(insert(ReservationNight), nights)
+    add_revenue(db.session, revenue)
+    stage_room_deltas(db.session, occupied_rooms=occupied)
+    mark_dirty(db.session, [(row['check_in'], row['check_out']) for row in rows])
+    mark_changed(db.session, 'Guest', 'Reservation', 'ReservationNight')
+    return dict(zip(items, ids))
+
+def book_block(entries, mode='all_or_nothing', attempts=3):
+    """Book a group of reservations in one transaction.
+
+    Returns (results, created) where results has one {'index', 'success', 'id' or
+    'error'} per entry and created maps entry index to reservation id. In all_or_nothing mode nothing is written unless every
+    entry fits; best_effort books the entries that fit, in request order. The
+    caller commits.
+    """
+    best_effort = mode == 'best_effort'
+    errors, items = {}, {}
+    for index, entry in enumerate(entries):
+        fields, error = parse_item(entry)
+        if error:
+            errors[index] = error
+        else:
+            items[index] = fields
+    known = {room_type_id for (room_type_id,) in db.session.query(RoomType.id).filter(
+        RoomType.id.in_({item['room_type_id'] for item in items.values()}))}
+    guest_ids = {item['guest_id'] for item in items.values() if item['guest_id']}
+    known_guests = {guest_id for (guest_id,) in db.session.query(Guest.id).filter(Guest.id.in_(guest_ids))}
+    for index, item in list(items.items()):
+        if item['room_type_id'] not in known:
+            errors[index] = 'Invalid room type'
+        elif item['guest_id'] and item['guest_id'] not in known_guests:
+            errors[index] = 'Invalid guest'
+        else:
+            continue
+        del items[index]
+    created = {}
+    if items and (best_effort or not errors):
+        for attempt in range(attempts):
+            unavailable = plan_block(items, best_effort)
+            if unavailable and not best_effort:
+                errors.update(unavailable)
+                break
+            try:
+                created = insert_block({index: item for index, item in items.items() if index not in unavailable})
+            except SoldOut:
+                # Another booking took the rooms between planning and claiming; plan again
+                db.session.rollback()
+                created = {}
+                continue
+            errors.update(unavailable)
+            break
+        else:
+            errors.update({index: SOLD_OUT for index in items if index not in errors})
+    failed = bool(errors) and not best_effort
+    results = []
+    for index in range(len(entries)):
+        if index in created and not failed:
+            results.append({'index': index, 'success': True, 'id': created[index]})
+        else:
+            results.append({'index': index, 'success': False,
+                            'error': errors.get(index, 'Not booked because another reservation in the block failed')})
+    return results, {} if failed else created
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+from flask import request, current_app
+from .changes import data_version
+
+class ReportCache:
+    """LRU cache of rendered report responses, bounded by entry count, total body bytes and age.
+
+    The TTL bounds staleness from writes the shared data version can't see,
+    such as the legacy app writing to the database directly.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('REPORT_CACHE_MAX_ENTRIES', self.max_entries)
+        self.max_bytes = app.config.get('REPORT_CACHE_MAX_BYTES', self.max_bytes)
+        self.ttl = app.config.get('REPORT_CACHE_TTL', self.ttl)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() >= entry[2]:
+                self._bytes -= len(self._entries.pop(key)[0])
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[:2]
+
+    def put(self, key, body, mimetype):
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key)[0])
+            self._entries[key] = (body, mimetype, time.monotonic() + self.ttl)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (old_body, _, _) = self._entries.popitem(last=False)
+                self._bytes -= len(old_body)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits/lookups*100,2) if lookups else 0,
+                'data_version': data_version()
+            }
+
+report_cache = ReportCache()
+
+def memoize_report(view):
+    """Serve repeated report requests from report_cache until a watched model is written, by any process.
+
+    The key includes today's date because report defaults are relative to it.
+    Streamed exports and error responses are never cached.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = (request.endpoint, tuple(sorted(request.args.items(multi=True))), date.today(), data_version())
+        cached = report_cache.get(key)
+        if cached is not None:
+            body, mimetype = cached
+            return current_app.response_class(body, mimetype=mimetype)
+        response = view(*args, **kwargs)
+        if getattr(response, 'status_code', None) == 200 and not response.is_streamed:
+            report_cache.put(key, response.get_data(), response.mimetype)
+        return response
+    return wrapper
@@ -0,0 +1,54 @@
+from itertools import chain
+from sqlalchemy import event, func, inspect, update
+from .. import db
+from ..models.stats import DataVersion
+from .upsert import insert_ignore
+
+WATCHED_MODELS = {'Reservation', 'Room', 'RoomType', 'Invoice', 'Payment', 'RateRule'}
+
+_listeners = []
+
+def data_version():
+    """Sum of the shared per-model write counters; it grows on every committed write by any process."""
+    return db.session.query(func.coalesce(func.sum(DataVersion.version), 0)).scalar()
+
+def on_commit(listener):
+    """Register listener(changed_model_names), called after every commit that wrote a watched model."""
+    _listeners.append(listener)
+    return listener
+
+def mark_changed(session, *model_names):
+    # For bulk statements that bypass the unit of work
+    session.info.setdefault('changed_models', set()).update(model_names)
+
+def previous_value(obj, name):
+    """Value of an attribute before the pending change, for use in before_flush hooks."""
+    history = inspect(obj).attrs[name].history
+    return history.deleted[0] if history.deleted else getattr(obj, name)
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changes(session, flush_context):
+    changed = {type(obj).__name__ for obj in chain(session.new, session.dirty, session.deleted)}
+    mark_changed(session, *changed)
+
+@event.listens_for(db.session, 'before_commit')
+def _bump_versions(session):
+    session.flush()
+    # Sorted so concurrent transactions lock the counter rows in the same order
+    for name in sorted(session.info.get('changed_models', set()) & WATCHED_MODELS):
+        bump = update(DataVersion).where(DataVersion.name == name).values(version=DataVersion.version + 1)
+        if session.execute(bump.execution_options(synchronize_session=False)).rowcount == 0:
+            session.execute(insert_ignore(session, DataVersion), [{'name': name, 'version': 0}])
+            session.execute(bump.execution_options(synchronize_session=False))
+
+@event.listens_for(db.session, 'after_commit')
+def _publish_changes(session):
+    changed = session.info.pop('changed_models', set()) & WATCHED_MODELS
+    if not changed:
+        return
+    for listener in _listeners:
+        listener(changed)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('changed_models', None)
@@ -0,0 +1,102 @@
+import threading
+import time
+from datetime import date, datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, func
+from .. import db
+from ..models.core import RoomType, Guest, Reservation
+from .changes import data_version
+from .revenue import revenue_windows
+from .room_state import room_counters
+
+RECENT_LIMIT = 5
+
+def _count(model, *criteria):
+    return select(func.count(model.id)).where(*criteria).scalar_subquery()
+
+def _revenue(*criteria):
+    return select(func.coalesce(func.sum(Reservation.total_price), 0)).where(
+        Reservation.status != 'cancelled', *criteria).scalar_subquery()
+
+def dashboard_counters(today=None, version=None):
+    """Room counts from the live counters, every other scalar in a single SELECT of scalar subqueries."""
+    today = today or date.today()
+    midnight = datetime.combine(today, datetime.min.time())
+    row = db.session.execute(select(
+        _count(Reservation, Reservation.status == 'confirmed', Reservation.check_in == today).label('todays_checkins'),
+        _count(Reservation, Reservation.status == 'checked-in', Reservation.check_out == today).label('todays_checkouts'),
+        _count(Reservation, Reservation.created_at >= midnight,
+               Reservation.created_at < midnight + timedelta(days=1)).label('todays_reservations'),
+        _count(Guest).label('total_guests'),
+        _revenue(Reservation.check_in == today).label('revenue_today'),
+        _revenue(Reservation.check_in == today - timedelta(days=1)).label('revenue_yesterday'),
+        _revenue(Reservation.check_in >= today - timedelta(days=30), Reservation.check_in <= today).label('revenue_month')
+    )).one()
+    stats = room_counters.counts(version)
+    stats.update(row._mapping)
+    bookable = stats['total_rooms'] - stats['maintenance_rooms']
+    stats['occupancy_rate'] = round(stats['occupied_rooms']/bookable*100,2) if bookable > 0 else 0
+    stats['revenue'] = {
+        'today': float(stats.pop('revenue_today')),
+        'yesterday': float(stats.pop('revenue_yesterday')),
+        'month': float(stats.pop('revenue_month'))
+    }
+    return stats
+
+def recent_reservations(limit=RECENT_LIMIT):
+    rows = db.session.query(
+        Reservation.id, Reservation.check_in, Reservation.check_out, Reservation.status,
+        Reservation.total_price, Guest.name, RoomType.name
+    ).join(Guest, Reservation.guest_id == Guest.id).join(RoomType, Reservation.room_type_id == RoomType.id).order_by(
+        Reservation.created_at.desc()).limit(limit).all()
+    return [{
+        'id': r[0],
+        'check_in': r[1].isoformat(),
+        'check_out': r[2].isoformat(),
+        'status': r[3],
+        'total_price': float(r[4]),
+        'guest_name': r[5],
+        'room_type_name': r[6]
+    } for r in rows]
+
+def compute_snapshot(version=None):
+    stats = dashboard_counters(version=version)
+    stats['recent_reservations'] = recent_reservations()
+    stats['revenue_breakdown'] = revenue_windows()
+    return stats
+
+class SnapshotCache:
+    """Process-wide dashboard snapshot keyed on the shared data version, with a short TTL.
+
+    A commit by any process bumps the version, so no snapshot outlives the
+    commit that changed it; the TTL bounds how stale figures from unwatched
+    tables (guests) can get. The version is read before computing, so a
+    stored snapshot is never older than its key.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = None
+        self._key = None
+        self._expires = 0
+
+    def get(self, ttl, version):
+        key = (date.today(), version)
+        with self._lock:
+            if self._value is not None and self._key == key and time.monotonic() < self._expires:
+                return self._value
+        value = compute_snapshot(version)
+        with self._lock:
+            self._value, self._key, self._expires = value, key, time.monotonic() + ttl
+        return value
+
+snapshot_cache = SnapshotCache()
+
+def dashboard_snapshot(version=None):
+    """Counters, recent reservations and revenue breakdown; treat the returned dict as read-only.
+
+    Callers that already know the current data version (the stream's poller) pass it to skip the lookup.
+    """
+    if version is None:
+        version = data_version()
+    return snapshot_cache.get(current_app.config.get('DASHBOARD_SNAPSHOT_TTL', 5), version)
@@ -0,0 +1,179 @@
+import json
+import threading
+import time
+from collections import deque
+from flask import current_app
+from .. import db
+from .activity import events_since, latest_event_id, serialize_event
+from .changes import data_version, on_commit
+from .dashboard import dashboard_snapshot
+
+ACTIVITY_BATCH = 50
+ACTIVITY_BUFFER = 500
+
+class Broadcaster:
+    """Wakes every waiting stream of this process when the poller sees something new.
+
+    Streams block on a Condition, so under a cooperative worker
+    (gunicorn -k gevent) an idle connection costs a greenlet, not a thread,
+    and no query.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self.seq = 0
+
+    def publish(self):
+        with self._condition:
+            self.seq += 1
+            self._condition.notify_all()
+
+    def wait(self, seen, timeout):
+        with self._condition:
+            self._condition.wait_for(lambda: self.seq != seen, timeout)
+            return self.seq
+
+broadcaster = Broadcaster()
+
+class ActivityPoller:
+    """One background reader of activity_event per process, however many streams are open.
+
+    Every poll seconds, or at once after a local commit, it reads events past
+    the newest one it has and the shared data version. It keeps the latest
+    ACTIVITY_BUFFER events in memory and wakes the streams when either
+    changed, so events and stats from other workers reach every stream at a
+    cost of one poll per process.
+    """
+
+    def __init__(self, poll=2):
+        self.poll = poll
+        self._lock = threading.Lock()
+        self._nudge = threading.Event()
+        self._app = None
+        self.buffer = deque(maxlen=ACTIVITY_BUFFER)
+        self.floor = None
+        self.version = None
+
+    def init_app(self, app):
+        self.poll = app.config.get('DASHBOARD_STREAM_POLL', self.poll)
+
+    def start(self, app):
+        if self._app is app:
+            return
+        floor = latest_event_id()
+        with self._lock:
+            if self._app is app:
+                return
+            self._app = app
+            self.buffer.clear()
+            self.floor = floor
+        threading.Thread(target=self._run, args=(app,), daemon=True).start()
+
+    def nudge(self):
+        self._nudge.set()
+
+    def _run(self, app):
+        with app.app_context():
+            while self._app is app:
+                self._nudge.wait(self.poll)
+                self._nudge.clear()
+                try:
+                    if self._read():
+                        broadcaster.publish()
+                except Exception:
+                    app.logger.exception('Activity poll failed')
+                finally:
+                    db.session.remove()
+
+    def _read(self):
+        changed = False
+        cursor = self.latest()
+        while True:
+            events = [(event.id, serialize_event(event)) for event in events_since(cursor, ACTIVITY_BATCH)]
+            with self._lock:
+                for event in events:
+                    if len(self.buffer) == self.buffer.maxlen:
+                        self.floor = self.buffer[0][0]
+                    self.buffer.append(event)
+            changed = changed or bool(events)
+            if len(events) < ACTIVITY_BATCH:
+                break
+            cursor = events[-1][0]
+        version = data_version()
+        if version != self.version:
+            self.version = version
+            changed = True
+        return changed
+
+    def latest(self):
+        with self._lock:
+            return self.buffer[-1][0] if self.buffer else self.floor
+
+    def since(self, cursor):
+        """Buffered (id, event) pairs after cursor, or None if the buffer no longer reaches back that far."""
+        with self._lock:
+            if cursor < self.floor:
+                return None
+            return [event for event in self.buffer if event[0] > cursor]
+
+activity_poller = ActivityPoller()
+
+@on_commit
+def _wake_poller(changed):
+    activity_poller.nudge()
+
+def sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+def dashboard_events(last_event_id=None, heartbeat=15, retry=3000):
+    """Yield SSE frames: stats deltas and new activity as they appear, a comment line when idle.
+
+    Streams read what the process's ActivityPoller collected and only query
+    the database themselves to replay events older than its buffer.
+    Activity frames carry the event id, so a reconnect with Last-Event-ID
+    replays exactly what the client missed. A fresh connection starts after
+    the newest event.
+    """
+    activity_poller.start(current_app._get_current_object())
+    try:
+        cursor = int(last_event_id) if last_event_id else activity_poller.latest()
+    except ValueError:
+        cursor = activity_poller.latest()
+    sent = {}
+    seq = broadcaster.seq
+    yield f'retry: {retry}\n\n'
+    last_frame = time.monotonic()
+    while True:
+        # The shared snapshot is cheap to re-read and also picks up the date rolling over
+        snapshot = dashboard_snapshot(activity_poller.version)
+        delta = {key: value for key, value in snapshot.items() if sent.get(key) != value}
+        if delta:
+            yield sse('stats', delta)
+            sent = snapshot
+            last_frame = time.monotonic()
+        events = activity_poller.since(cursor)
+        while events is None:
+            # Reconnected from further back than the buffer holds: replay from the table
+            missed = events_since(cursor, ACTIVITY_BATCH)
+            for event in missed:
+                cursor = event.id
+                yield sse('activity', serialize_event(event), event.id)
+            if len(missed) < ACTIVITY_BATCH:
+                # Everything committed past cursor has been sent, buffered events included
+                cursor = max(cursor, activity_poller.floor)
+            events = activity_poller.since(cursor)
+        for event_id, payload in events:
+            cursor = event_id
+            yield sse('activity', payload, event_id)
+            last_frame = time.monotonic()
+        # Give the connection back to the pool while idle
+        db.session.close()
+        seq = broadcaster.wait(seq, max(heartbeat - (time.monotonic() - last_frame), 0))
+        if time.monotonic() - last_frame >= heartbeat:
+            yield ': heartbeat\n\n'
+            last_frame = time.monotonic()
@@ -0,0 +1,32 @@
+import csv
+import io
+import json
+from flask import Response, stream_with_context
+
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+YIELD_PER = 1000
+
+def stream_query(query, yield_per=YIELD_PER):
+    """Iterate a query through a server-side cursor, holding one batch of rows at a time."""
+    return query.execution_options(stream_results=True, yield_per=yield_per)
+
+def export_response(rows, fields, fmt, filename):
+    """Stream an iterable of dicts as CSV or NDJSON without building the body in memory."""
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    def generate_ndjson():
+        for row in rows:
+            yield json.dumps(row) + '\n'
+
+    generate = generate_csv if fmt == 'csv' else generate_ndjson
+    return Response(stream_with_context(generate()), mimetype=EXPORT_FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename={filename}.{fmt}'})
@@ -0,0 +1,141 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from sqlalchemy import event, func, select, update
+from .. import db
+from ..models.core import Room, Reservation, RoomInventory
+from .changes import previous_value
+from .occupancy import ACTIVE_STATUSES, nightly_counts
+from .upsert import insert_ignore
+
+class SoldOut(Exception):
+    def __init__(self, room_type_id, check_in, check_out):
+        super().__init__(f'Room type {room_type_id} is sold out for {check_in.isoformat()} to {check_out.isoformat()}')
+        self.room_type_id = room_type_id
+        self.check_in = check_in
+        self.check_out = check_out
+
+def _stay(status, room_type_id, check_in, check_out):
+    if (status or 'confirmed') not in ACTIVE_STATUSES or None in (room_type_id, check_in, check_out) \
+            or check_out <= check_in:
+        return None
+    return room_type_id, check_in, check_out
+
+def _capacity(room_type_id):
+    return select(func.count(Room.id)).where(
+        Room.room_type_id == room_type_id, Room.status != 'maintenance').scalar_subquery()
+
+def ensure_inventory(session, room_type_id, check_in, check_out, exclude=()):
+    """Create missing rows for [check_in, check_out), counted from the committed reservations."""
+    existing = set(session.scalars(select(RoomInventory.night).where(
+        RoomInventory.room_type_id == room_type_id, RoomInventory.night >= check_in, RoomInventory.night < check_out)))
+    days = (check_out - check_in).days
+    if len(existing) == days:
+        return
+    stays = session.query(Reservation.check_in, Reservation.check_out).filter(
+        Reservation.room_type_id == room_type_id, Reservation.status.in_(ACTIVE_STATUSES),
+        Reservation.check_in < check_out, Reservation.check_out > check_in,
+        Reservation.id.notin_([reservation_id for reservation_id in exclude if reservation_id is not None]))
+    counts = nightly_counts(stays, check_in, check_out - timedelta(days=1))
+    session.execute(insert_ignore(session, RoomInventory), [
+        {'room_type_id': room_type_id, 'night': check_in + timedelta(days=offset), 'booked': booked}
+        for offset, booked in enumerate(counts) if check_in + timedelta(days=offset) not in existing])
+
+def claim(session, room_type_id, check_in, check_out, quantity=1, exclude=()):
+    """Take quantity rooms on every night, or raise SoldOut without changing anything.
+
+    A single UPDATE only touches the (room_type, night) rows of the stay and
+    only where a room is left, so concurrent bookings of other types or dates
+    never wait on each other and two bookings for the last room can't both win.
+    """
+    ensure_inventory(session, room_type_id, check_in, check_out, exclude)
+    result = session.execute(update(RoomInventory).where(
+        RoomInventory.room_type_id == room_type_id,
+        RoomInventory.night >= check_in,
+        RoomInventory.night < check_out,
+        RoomInventory.booked + quantity <= _capacity(room_type_id)
+    ).values(booked=RoomInventory.booked + quantity).execution_options(synchronize_session=False))
+    if result.rowcount != (check_out - check_in).days:
+        raise SoldOut(room_type_id, check_in, check_out)
+
+def release(session, room_type_id, check_in, check_out, quantity=1):
+    session.execute(update(RoomInventory).where(
+        RoomInventory.room_type_id == room_type_id,
+        RoomInventory.night >= check_in,
+        RoomInventory.night < check_out
+    ).values(booked=RoomInventory.booked - quantity).execution_options(synchronize_session=False))
+
+def booked_by_night(session, room_type_ids, start, end):
+    """Booked rooms per room type for each night of [start, end), read from the inventory rows.
+
+    Nights no claim has reached yet have no row; they are counted from the
+    reservations, without creating rows, so reads never write.
+    """
+    days = (end - start).days
+    booked = {room_type_id: [None] * days for room_type_id in room_type_ids}
+    for room_type_id, night, count in session.query(RoomInventory.room_type_id, RoomInventory.night, RoomInventory.booked).filter(
+            RoomInventory.room_type_id.in_(list(booked)), RoomInventory.night >= start, RoomInventory.night < end):
+        booked[room_type_id][(night - start).days] = count
+    missing = [room_type_id for room_type_id, nights in booked.items() if None in nights]
+    if missing:
+        stays = defaultdict(list)
+        for room_type_id, check_in, check_out in session.query(
+                Reservation.room_type_id, Reservation.check_in, Reservation.check_out).filter(
+                Reservation.room_type_id.in_(missing), Reservation.status.in_(ACTIVE_STATUSES),
+                Reservation.check_in < end, Reservation.check_out > start):
+            stays[room_type_id].append((check_in, check_out))
+        for room_type_id in missing:
+            counted = nightly_counts(stays[room_type_id], start, end - timedelta(days=1))
+            booked[room_type_id] = [count if count is not None else counted[offset]
+                                    for offset, count in enumerate(booked[room_type_id])]
+    return booked
+
+def rebuild_inventory():
+    """Drop all inventory rows and recount the nights from today on; older nights are recreated on demand."""
+    today = date.today()
+    RoomInventory.query.delete()
+    stays = defaultdict(list)
+    for room_type_id, check_in, check_out in db.session.query(
+            Reservation.room_type_id, Reservation.check_in, Reservation.check_out).filter(
+            Reservation.status.in_(ACTIVE_STATUSES), Reservation.check_out > today):
+        stays[room_type_id].append((check_in, check_out))
+    rows = []
+    for room_type_id, intervals in stays.items():
+        last = max(check_out for _, check_out in intervals)
+        for offset, booked in enumerate(nightly_counts(intervals, today, last - timedelta(days=1))):
+            rows.append({'room_type_id': room_type_id, 'night': today + timedelta(days=offset), 'booked': booked})
+    if rows:
+        db.session.execute(RoomInventory.__table__.insert(), rows)
+    db.session.commit()
+    return len(rows)
+
+@event.listens_for(db.session, 'before_flush')
+def _claim_inventory(session, flush_context, instances):
+    released, claimed, touched = [], defaultdict(list), []
+    for obj in session.new:
+        if isinstance(obj, Reservation):
+            touched.append(obj.id)
+            new = _stay(obj.status, obj.room_type_id, obj.check_in, obj.check_out)
+            if new:
+                claimed[new].append(obj.id)
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Reservation):
+            continue
+        touched.append(obj.id)
+        old = _stay(*(previous_value(obj, name) for name in ('status', 'room_type_id', 'check_in', 'check_out')))
+        new = None if obj in session.deleted else _stay(obj.status, obj.room_type_id, obj.check_in, obj.check_out)
+        if old == new:
+            continue
+        if old:
+            released.append(old)
+        if new:
+            claimed[new].append(obj.id)
+    if not released and not claimed:
+        return
+    # Rows created on demand are counted from the database, where the reservations
+    # of this flush still hold their old values, so those are left out of the count
+    with session.no_autoflush:
+        # A fixed order so overlapping transactions lock rows in the same sequence
+        for stay in sorted(released):
+            release(session, *stay)
+        for stay in sorted(claimed):
+            claim(session, *stay, quantity=len(claimed[stay]), exclude=touched)
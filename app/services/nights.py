@@ -0,0 +1,83 @@
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import delete, func, insert
+from .. import db
+from ..models.core import Reservation, ReservationNight
+from .changes import mark_changed
+
+CENT = Decimal('0.01')
+
+def split_rate(total, nights):
+    """Spread a stay total over its nights, putting the rounding remainder on the last one."""
+    if nights <= 0:
+        return []
+    total = Decimal(str(total))
+    rate = (total / nights).quantize(CENT, rounding=ROUND_HALF_UP)
+    return [rate] * (nights - 1) + [total - rate * (nights - 1)]
+
+def night_rows(reservation, rates=None):
+    count = (reservation.check_out - reservation.check_in).days
+    rates = rates or split_rate(reservation.total_price, count)
+    return [{
+        'reservation_id': reservation.id,
+        'room_type_id': reservation.room_type_id,
+        'room_id': reservation.room_id,
+        'night': reservation.check_in + timedelta(days=i),
+        'nightly_rate': rates[i],
+        'status': reservation.status or 'confirmed'
+    } for i in range(count)]
+
+def sync_nights(reservation, rates=None):
+    """Rebuild a flushed reservation's night rows inside the caller's transaction.
+
+    One DELETE and one executemany INSERT, so the statement count doesn't
+    grow with the length of the stay.
+    """
+    db.session.execute(delete(ReservationNight).where(ReservationNight.reservation_id == reservation.id)
+                       .execution_options(synchronize_session=False))
+    rows = night_rows(reservation, rates)
+    if rows:
+        db.session.execute(insert(ReservationNight), rows)
+    db.session.expire(reservation, ['nights'])
+    mark_changed(db.session, 'ReservationNight')
+
+def restamp_nights(reservation):
+    """Carry a status or room change onto the existing night rows, keeping their nightly rates."""
+    db.session.query(ReservationNight).filter(ReservationNight.reservation_id == reservation.id).update(
+        {'status': reservation.status or 'confirmed', 'room_id': reservation.room_id})
+
+def rebuild_nights(batch_size=1000):
+    db.session.query(ReservationNight).delete()
+    batch = []
+    count = 0
+    for reservation in Reservation.query.order_by(Reservation.id).yield_per(batch_size):
+        batch.extend(night_rows(reservation))
+        if len(batch) >= batch_size:
+            db.session.execute(insert(ReservationNight), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(ReservationNight), batch)
+        count += len(batch)
+    db.session.commit()
+    return count
+
+def nightly_performance(start, end):
+    """Rooms sold and room revenue per night from the fact table, one GROUP BY."""
+    rows = db.session.query(
+        ReservationNight.night,
+        func.count(ReservationNight.id),
+        func.coalesce(func.sum(ReservationNight.nightly_rate), 0)
+    ).filter(
+        ReservationNight.night >= start,
+        ReservationNight.night <= end,
+        ReservationNight.status != 'cancelled'
+    ).group_by(ReservationNight.night).all()
+    by_night = {night: (sold, float(revenue)) for night, sold, revenue in rows}
+    daily = []
+    cur = start
+    while cur <= end:
+        sold, revenue = by_night.get(cur, (0, 0.0))
+        daily.append((cur, sold, revenue))
+        cur += timedelta(days=1)
+    return daily
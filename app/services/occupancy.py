@@ -0,0 +1,64 @@
+from collections import defaultdict
+from itertools import accumulate
+from sqlalchemy import func
+from .. import db
+from ..models.core import Reservation, Room, RoomType
+
+ACTIVE_STATUSES = ('confirmed', 'checked-in')
+
+def nightly_counts(intervals, start, end):
+    """Sweep [check_in, check_out) intervals into occupied counts for each night start..end."""
+    days = (end - start).days + 1
+    if days <= 0:
+        return []
+    delta = [0] * (days + 1)
+    for check_in, check_out in intervals:
+        lo = max((check_in - start).days, 0)
+        hi = min((check_out - start).days, days)
+        if lo < hi:
+            delta[lo] += 1
+            delta[hi] -= 1
+    return list(accumulate(delta[:days]))
+
+def overlapping_stays(start, end, statuses=ACTIVE_STATUSES):
+    """Load (room_type_id, check_in, check_out) for every stay touching start..end in one query."""
+    return db.session.query(Reservation.room_type_id, Reservation.check_in, Reservation.check_out).filter(
+        Reservation.status.in_(statuses),
+        Reservation.check_in <= end,
+        Reservation.check_out > start
+    ).all()
+
+def daily_occupancy(start, end, stays=None):
+    if stays is None:
+        stays = overlapping_stays(start, end)
+    return nightly_counts(((check_in, check_out) for _, check_in, check_out in stays), start, end)
+
+def room_nights_sold(stays, start, end):
+    days = max((end - start).days + 1, 0)
+    sold = defaultdict(int)
+    for room_type_id, check_in, check_out in stays:
+        lo = max((check_in - start).days, 0)
+        hi = min((check_out - start).days, days)
+        if lo < hi:
+            sold[room_type_id] += hi - lo
+    return sold
+
+def room_type_occupancy(start, end, sold=None):
+    """Room-nights sold over room-nights available per room type, clipped to start..end."""
+    if sold is None:
+        sold = room_nights_sold(overlapping_stays(start, end), start, end)
+    days = max((end - start).days + 1, 0)
+    room_counts = db.session.query(RoomType.id, RoomType.name, func.count(Room.id)).outerjoin(
+        Room, Room.room_type_id == RoomType.id).group_by(RoomType.id, RoomType.name).all()
+    breakdown = []
+    for room_type_id, name, room_count in room_counts:
+        available = room_count * days
+        breakdown.append({
+            'room_type_id': room_type_id,
+            'room_type_name': name,
+            'room_count': room_count,
+            'room_nights_sold': sold.get(room_type_id, 0),
+            'room_nights_available': available,
+            'occupancy_rate': round(sold.get(room_type_id, 0)/available*100,2) if available else 0
+        })
+    return breakdown
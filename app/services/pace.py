@@ -0,0 +1,46 @@
+from datetime import date
+from itertools import accumulate
+from sqlalchemy import or_, and_
+from .. import db
+from ..models.core import Reservation
+
+LAST_YEAR_DAYS = 364  # same weekday last year
+
+def pace(start, end, days_before):
+    """On-the-books room-nights per stay date at days_before arrival, this year and last.
+
+    Night d of a stay counts when the booking existed at the end of day
+    d - days_before and, if cancelled, was cancelled after it, so each stay
+    contributes one [lo, hi) interval and both years come out of a single pass
+    with two prefix sums. There is no status history, so a cancelled
+    reservation's updated_at stands in for the cancellation time.
+    """
+    days = (end - start).days + 1
+    base = start.toordinal()
+    ly_base = base - LAST_YEAR_DAYS
+    rows = db.session.query(
+        Reservation.check_in, Reservation.check_out, Reservation.created_at,
+        Reservation.status, Reservation.updated_at
+    ).filter(or_(
+        and_(Reservation.check_in <= end, Reservation.check_out > start),
+        and_(Reservation.check_in <= date.fromordinal(end.toordinal() - LAST_YEAR_DAYS),
+             Reservation.check_out > date.fromordinal(ly_base))
+    ))
+    delta = [0] * (days + 1)
+    ly_delta = [0] * (days + 1)
+    for check_in, check_out, created_at, status, updated_at in rows:
+        if created_at is None:
+            continue
+        lo = max(check_in.toordinal(), created_at.toordinal() + days_before)
+        hi = check_out.toordinal()
+        if status == 'cancelled':
+            hi = min(hi, updated_at.toordinal() + days_before)
+        if lo >= hi:
+            continue
+        for counts, offset in ((delta, base), (ly_delta, ly_base)):
+            first = max(lo - offset, 0)
+            last = min(hi - offset, days)
+            if first < last:
+                counts[first] += 1
+                counts[last] -= 1
+    return list(accumulate(delta[:days])), list(accumulate(ly_delta[:days]))
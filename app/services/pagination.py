@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import date, datetime
+from flask import jsonify
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+class ListArgsError(ValueError):
+    pass
+
+def _encode(values):
+    raw = json.dumps([value.isoformat() if isinstance(value, (date, datetime)) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def _decode(cursor, columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [column.type.python_type.fromisoformat(value)
+                if column.type.python_type in (date, datetime) else column.type.python_type(value)
+                for column, value in zip(columns, values)]
+    except (TypeError, ValueError):
+        raise ListArgsError('Invalid cursor')
+
+def _after(columns, values, descending):
+    # (a, b) > (x, y) spelled out as a > x OR (a = x AND b > y), which every backend can seek on
+    clauses = []
+    for position, column in enumerate(columns):
+        value = values[position]
+        clauses.append(and_(*[earlier == seen for earlier, seen in zip(columns[:position], values[:position])],
+                            column < value if descending else column > value))
+    return or_(*clauses)
+
+def page_args(args):
+    """(limit, after) from request args; limit is None for unpaged requests (neither limit nor after given)."""
+    if 'limit' not in args and 'after' not in args:
+        return None, None
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ListArgsError('limit must be a number')
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise ListArgsError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    return limit, args.get('after') or None
+
+def list_filters(args):
+    """Shared list filters: status (comma-separated), room_type_id and a start/end date range."""
+    filters = {'status': [status for status in args.get('status', '').split(',') if status]}
+    try:
+        filters['room_type_id'] = int(args['room_type_id']) if args.get('room_type_id') else None
+        for name in ('start', 'end'):
+            filters[name] = datetime.strptime(args[name], '%Y-%m-%d').date() if args.get(name) else None
+    except ValueError:
+        raise ListArgsError('room_type_id must be a number and start/end YYYY-MM-DD')
+    if filters['start'] and filters['end'] and filters['end'] <= filters['start']:
+        raise ListArgsError('end must be after start')
+    return filters
+
+def keyset_page(query, columns, limit, after=None, descending=False):
+    """One page of query ordered by columns, which must be unique together; returns (rows, next_cursor).
+
+    The cursor holds the last row's key, so each page is an index seek rather
+    than an OFFSET that reads every row before it. A limit of None returns
+    every row.
+    """
+    if after:
+        query = query.filter(_after(columns, _decode(after, columns), descending))
+    query = query.order_by(*[column.desc() if descending else column for column in columns])
+    if limit is None:
+        return query.all(), None
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, _encode([getattr(rows[-1], column.key) for column in columns])
+
+def list_response(items, next_cursor, limit):
+    """Bare array for unpaged requests, as the pages expect; items plus next_cursor otherwise."""
+    if limit is None:
+        return jsonify(items)
+    return jsonify({'items': items, 'next_cursor': next_cursor})
@@ -0,0 +1,151 @@
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import func
+from .. import db
+from ..models.core import Room, RoomType
+from ..models.pricing import RateRule
+from .availability import availability_calendar
+from .changes import on_commit
+from .inventory import booked_by_night
+
+RULE_KINDS = ('season', 'day_of_week', 'length_of_stay', 'occupancy')
+PRICING_MODELS = {'RateRule', 'RoomType'}
+LOOKBACK_DAYS = 30
+HORIZON_DAYS = 730
+CENT = Decimal('0.01')
+
+def _factor(percent):
+    return 1 + Decimal(str(percent)) / 100
+
+def _nightly_offsets(rule, start, days):
+    """Offsets into a table starting at start that a season or day-of-week rule covers."""
+    lo = max((rule.start_date - start).days, 0) if rule.start_date else 0
+    hi = min((rule.end_date - start).days + 1, days) if rule.end_date else days
+    if rule.kind == 'season':
+        return range(lo, hi)
+    weekdays = {int(day) for day in (rule.days_of_week or '').split(',') if day.strip()}
+    return [offset for offset in range(lo, hi) if (start + timedelta(days=offset)).weekday() in weekdays]
+
+def compile_rates(start, days):
+    """Nightly rate per room type for start..start+days-1 from base prices and season/day-of-week rules.
+
+    Length-of-stay and occupancy rules depend on the stay and on current bookings,
+    so they are kept aside and applied when quoting.
+    """
+    room_types = db.session.query(RoomType.id, RoomType.base_price).all()
+    rules = RateRule.query.filter_by(active=True).order_by(RateRule.id).all()
+    nightly = {}
+    for room_type_id, base_price in room_types:
+        rates = [Decimal(str(base_price))] * days
+        for rule in rules:
+            if rule.kind in ('season', 'day_of_week') and rule.room_type_id in (None, room_type_id):
+                factor = _factor(rule.percent)
+                for offset in _nightly_offsets(rule, start, days):
+                    rates[offset] *= factor
+        nightly[room_type_id] = [rate.quantize(CENT, rounding=ROUND_HALF_UP) for rate in rates]
+    return {
+        'start': start,
+        'days': days,
+        'nightly': nightly,
+        'length_of_stay': [(rule.room_type_id, rule.min_nights, _factor(rule.percent)) for rule in rules
+                           if rule.kind == 'length_of_stay' and rule.min_nights],
+        'occupancy': [(rule.room_type_id, Decimal(str(rule.min_occupancy)), _factor(rule.percent)) for rule in rules
+                      if rule.kind == 'occupancy' and rule.min_occupancy is not None]
+    }
+
+class RateTable:
+    """Compiled rates for LOOKBACK_DAYS back to HORIZON_DAYS ahead, shared by the process.
+
+    Dropped on any commit touching a rate rule or room type, and after TTL
+    seconds so edits made by other workers are picked up. Stays outside the
+    window are compiled on demand and not stored.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._table = None
+        self._expires = 0
+        self._generation = 0
+
+    def init_app(self, app):
+        self.ttl = app.config.get('PRICING_CACHE_TTL', self.ttl)
+
+    def get(self, check_in, check_out):
+        start = date.today() - timedelta(days=LOOKBACK_DAYS)
+        days = LOOKBACK_DAYS + HORIZON_DAYS
+        if check_in < start or (check_out - start).days > days:
+            return compile_rates(check_in, (check_out - check_in).days)
+        with self._lock:
+            if self._table is not None and self._table['start'] == start and time.monotonic() < self._expires:
+                return self._table
+            generation = self._generation
+        table = compile_rates(start, days)
+        with self._lock:
+            if generation == self._generation:
+                self._table, self._expires = table, time.monotonic() + self.ttl
+        return table
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._table = None
+
+rate_table = RateTable()
+
+@on_commit
+def _invalidate_rates(changed):
+    if changed & PRICING_MODELS:
+        rate_table.invalidate()
+
+def _best(rules, room_type_id, value):
+    """Factor of the matching rule with the highest threshold at or below value, room-type rules winning ties."""
+    best = None
+    for rule_type_id, threshold, factor in rules:
+        if rule_type_id in (None, room_type_id) and threshold <= value:
+            key = (threshold, rule_type_id is not None)
+            if best is None or key > best[0]:
+                best = (key, factor)
+    return best[1] if best else None
+
+def quote(room_type_id, check_in, check_out, table=None):
+    """Nightly rates and total for a stay, or None for an unknown room type."""
+    table = table or rate_table.get(check_in, check_out)
+    rates = table['nightly'].get(room_type_id)
+    if rates is None:
+        # Room type created in another process since the table was compiled
+        table = compile_rates(check_in, (check_out - check_in).days)
+        rates = table['nightly'].get(room_type_id)
+        if rates is None:
+            return None
+    count = (check_out - check_in).days
+    offset = (check_in - table['start']).days
+    nightly = rates[offset:offset + count]
+    if table['occupancy']:
+        # Shared inventory rows rather than anything per process, so every worker quotes the same price
+        rooms = db.session.query(func.count(Room.id)).filter(
+            Room.room_type_id == room_type_id, Room.status != 'maintenance').scalar()
+        if rooms:
+            booked = booked_by_night(db.session, [room_type_id], check_in, check_out)[room_type_id]
+            for night, count_booked in enumerate(booked):
+                factor = _best(table['occupancy'], room_type_id, Decimal(count_booked * 100) / rooms)
+                if factor:
+                    nightly[night] = (nightly[night] * factor).quantize(CENT, rounding=ROUND_HALF_UP)
+    factor = _best(table['length_of_stay'], room_type_id, count)
+    if factor:
+        nightly = [(rate * factor).quantize(CENT, rounding=ROUND_HALF_UP) for rate in nightly]
+    return {'room_type_id': room_type_id, 'nights': count, 'nightly': nightly, 'total': sum(nightly, Decimal(0))}
+
+def quote_all(check_in, check_out):
+    """Quotes and free room counts for every room type from one compiled table and one calendar query."""
+    table = rate_table.get(check_in, check_out)
+    quotes = []
+    for row in availability_calendar(check_in, check_out):
+        stay = quote(row['room_type_id'], check_in, check_out, table)
+        if stay:
+            stay['room_type_name'] = row['room_type_name']
+            stay['available'] = min(row['free'])
+            quotes.append(stay)
+    return quotes
@@ -0,0 +1,49 @@
+from .. import db
+from .pagination import ListArgsError
+
+class Field:
+    """One field of a list API: the SQL expression behind it, the outer join it needs, if any, and a JSON conversion."""
+
+    def __init__(self, expression, convert=None, join=None):
+        self.expression = expression
+        self.convert = convert
+        self.join = join
+
+def as_float(value):
+    return float(value) if value is not None else None
+
+def as_str(value):
+    return str(value) if value is not None else None
+
+def as_iso(value):
+    return value.isoformat() if value is not None else None
+
+def requested_fields(args, fields):
+    """Field names from ?fields=a,b in request order, or None when the parameter is absent."""
+    if 'fields' not in args:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in args['fields'].split(',') if name.strip()))
+    unknown = [name for name in names if name not in fields]
+    if not names or unknown:
+        raise ListArgsError(f'fields must be a comma-separated subset of: {", ".join(fields)}')
+    return names
+
+def projection_query(entity, fields, names, keys=()):
+    """Column query selecting only the named fields, plus the keyset keys, with the outer joins they need.
+
+    Rows come back as plain tuples, so nothing is loaded into the identity map.
+    """
+    columns = [fields[name].expression.label(name) for name in names]
+    columns += [key.label(key.key) for key in keys if key.key not in names]
+    query = db.session.query(*columns).select_from(entity)
+    joined = []
+    for name in names:
+        join = fields[name].join
+        if join is not None and not any(join is seen for seen in joined):
+            query = query.outerjoin(*join)
+            joined.append(join)
+    return query
+
+def project_rows(rows, fields, names):
+    return [{name: fields[name].convert(value) if fields[name].convert else value
+             for name, value in zip(names, row)} for row in rows]
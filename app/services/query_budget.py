@@ -0,0 +1,51 @@
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+def _count(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'query_count' in g:
+        g.query_count += 1
+
+class QueryBudget:
+    """Counts SQL statements per request and flags requests that issue more than QUERY_BUDGET.
+
+    Off unless QUERY_BUDGET is set. With app.testing an over-budget request
+    raises, so a lazy load per row fails the test run at the first endpoint
+    it reaches; otherwise it is logged. Views that legitimately need more
+    declare their own limit with @query_budget.allow(n), or opt out
+    with @query_budget.allow(None).
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit
+
+    def init_app(self, app):
+        self.limit = app.config.get('QUERY_BUDGET', self.limit)
+        if not self.limit:
+            return
+        if not event.contains(Engine, 'before_cursor_execute', _count):
+            event.listen(Engine, 'before_cursor_execute', _count)
+        app.before_request(self._start)
+        app.after_request(self._check)
+
+    def allow(self, limit):
+        def decorator(view):
+            view.query_budget = limit
+            return view
+        return decorator
+
+    def _start(self):
+        g.query_count = 0
+
+    def _check(self, response):
+        view = current_app.view_functions.get(request.endpoint)
+        limit = getattr(view, 'query_budget', self.limit)
+        count = g.pop('query_count', 0)
+        if limit and count > limit:
+            message = f'{request.method} {request.path} issued {count} queries, budget is {limit}'
+            if current_app.testing:
+                raise AssertionError(message)
+            current_app.logger.warning(message)
+        return response
+
+query_budget = QueryBudget()
@@ -0,0 +1,70 @@
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, text
+from .. import db
+from ..models.core import Room, Reservation, RoomInventory
+from .occupancy import ACTIVE_STATUSES
+
+HOT_PATH_INDEXES = (
+    'ix_reservation_check_in_status',
+    'ix_reservation_stay_cover',
+    'ix_reservation_type_stay',
+    'ix_reservation_room_stay',
+    'ix_reservation_created_at',
+    'ix_room_type_status',
+)
+
+def hot_path_indexes():
+    return [index for table in (Reservation.__table__, Room.__table__) for index in table.indexes
+            if index.name in HOT_PATH_INDEXES]
+
+def hot_queries(today, room_type_id=1):
+    """The statements behind the busiest endpoints, with representative parameters."""
+    midnight = datetime.combine(today, datetime.min.time())
+    return [
+        ('occupancy report stays', select(Reservation.room_type_id, Reservation.check_in, Reservation.check_out).where(
+            Reservation.status.in_(ACTIVE_STATUSES), Reservation.check_in <= today,
+            Reservation.check_out > today - timedelta(days=30))),
+        ('availability calendar inventory', select(RoomInventory.room_type_id, RoomInventory.night, RoomInventory.booked).where(
+            RoomInventory.room_type_id.in_([room_type_id]), RoomInventory.night >= today,
+            RoomInventory.night < today + timedelta(days=30))),
+        ('dashboard arrivals', select(func.count(Reservation.id)).where(
+            Reservation.status == 'confirmed', Reservation.check_in == today)),
+        ('dashboard departures', select(func.count(Reservation.id)).where(
+            Reservation.status == 'checked-in', Reservation.check_out == today)),
+        ('dashboard new reservations', select(func.count(Reservation.id)).where(
+            Reservation.created_at >= midnight, Reservation.created_at < midnight + timedelta(days=1))),
+        ('dashboard month revenue', select(func.sum(Reservation.total_price)).where(
+            Reservation.status != 'cancelled', Reservation.check_in >= today - timedelta(days=30),
+            Reservation.check_in <= today)),
+        ('recent reservations', select(Reservation.id).order_by(Reservation.created_at.desc()).limit(5)),
+        ('inventory recount for a room type', select(Reservation.check_in, Reservation.check_out).where(
+            Reservation.room_type_id == room_type_id, Reservation.status.in_(ACTIVE_STATUSES),
+            Reservation.check_in < today + timedelta(days=14), Reservation.check_out > today)),
+        ('room assignment occupied rooms', select(
+            Reservation.room_id, Reservation.guest_id, Reservation.check_in, Reservation.check_out
+        ).where(Reservation.room_id.isnot(None), Reservation.status.in_(ACTIVE_STATUSES),
+                Reservation.check_in < today + timedelta(days=7), Reservation.check_out >= today)),
+        ('bookable rooms per type', select(Room.room_type_id, func.count(Room.id)).where(
+            Room.status != 'maintenance').group_by(Room.room_type_id)),
+    ]
+
+def explain(statement):
+    """The database's query plan for a statement, one line per plan row."""
+    bind = db.session.get_bind()
+    sql = str(statement.compile(dialect=bind.dialect, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if bind.dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = db.session.execute(text(prefix + sql)).all()
+    if bind.dialect.name == 'sqlite':
+        return [row[-1] for row in rows]
+    return [' | '.join(str(value) for value in row) for row in rows]
+
+def time_query(statement, repeat=3):
+    """Best wall time in seconds over repeat runs, fetching every row."""
+    best = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        db.session.execute(statement).all()
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    return best
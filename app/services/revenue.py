@@ -0,0 +1,123 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import and_, case, event, func, insert, update
+from .. import db
+from ..models.core import Reservation, RoomType
+from ..models.stats import RollupWatermark, RoomTypeRevenue, RoomTypeRevenueDay
+from .changes import previous_value
+from .rollups import lock_watermark
+from .upsert import insert_ignore
+
+TRAILING_DAYS = 30
+# Set by rebuild_revenue; until then the aggregates only hold writes made since the upgrade
+WATERMARK = 'room_type_revenue'
+
+def contribution(status, room_type_id, check_in, total_price):
+    if status == 'cancelled' or room_type_id is None or check_in is None or total_price is None:
+        return None
+    return (room_type_id, check_in), Decimal(str(total_price))
+
+@event.listens_for(db.session, 'before_flush')
+def _adjust_revenue(session, flush_context, instances):
+    deltas = defaultdict(Decimal)
+    for obj in session.new:
+        if isinstance(obj, Reservation):
+            new = contribution(obj.status, obj.room_type_id, obj.check_in, obj.total_price)
+            if new:
+                deltas[new[0]] += new[1]
+    for obj in list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, Reservation):
+            continue
+        old = contribution(*(previous_value(obj, name) for name in ('status', 'room_type_id', 'check_in', 'total_price')))
+        if old:
+            deltas[old[0]] -= old[1]
+        if obj not in session.deleted:
+            new = contribution(obj.status, obj.room_type_id, obj.check_in, obj.total_price)
+            if new:
+                deltas[new[0]] += new[1]
+    add_revenue(session, deltas)
+
+def add_revenue(session, deltas):
+    """Apply {(room_type_id, check_in): amount} to the revenue aggregates; bulk inserts call it directly."""
+    lifetime = defaultdict(Decimal)
+    with session.no_autoflush:
+        for (room_type_id, day), delta in deltas.items():
+            if not delta:
+                continue
+            lifetime[room_type_id] += delta
+            _increment(session, RoomTypeRevenueDay, delta, room_type_id=room_type_id, day=day)
+        for room_type_id, delta in lifetime.items():
+            if delta:
+                _increment(session, RoomTypeRevenue, delta, room_type_id=room_type_id)
+
+def _increment(session, model, delta, **columns):
+    # Create the row if missing, then increment in SQL so concurrent writers
+    # neither overwrite each other nor collide on the first insert
+    session.execute(insert_ignore(session, model), [dict(columns, revenue=0)])
+    session.execute(update(model).filter_by(**columns).values(revenue=model.revenue + delta).execution_options(
+        synchronize_session=False))
+
+def rebuild_revenue():
+    """Recount the aggregates from reservations and mark them complete; run by `flask rebuild-revenue` and create-db."""
+    lock_watermark(WATERMARK)
+    RoomTypeRevenueDay.query.delete()
+    RoomTypeRevenue.query.delete()
+    active = Reservation.status != 'cancelled'
+    days = db.session.query(Reservation.room_type_id, Reservation.check_in, func.sum(Reservation.total_price)).filter(
+        active).group_by(Reservation.room_type_id, Reservation.check_in).all()
+    if days:
+        db.session.execute(insert(RoomTypeRevenueDay), [
+            {'room_type_id': t, 'day': d, 'revenue': revenue} for t, d, revenue in days])
+        totals = defaultdict(Decimal)
+        for t, _, revenue in days:
+            totals[t] += Decimal(str(revenue))
+        db.session.execute(insert(RoomTypeRevenue), [
+            {'room_type_id': t, 'revenue': revenue} for t, revenue in totals.items()])
+    db.session.commit()
+
+def _aggregate_windows(month_start, trailing_start, today):
+    windows = db.session.query(
+        RoomTypeRevenueDay.room_type_id,
+        func.sum(case((RoomTypeRevenueDay.day >= month_start, RoomTypeRevenueDay.revenue), else_=0)),
+        func.sum(case((RoomTypeRevenueDay.day >= trailing_start, RoomTypeRevenueDay.revenue), else_=0))
+    ).filter(
+        RoomTypeRevenueDay.day >= min(month_start, trailing_start),
+        RoomTypeRevenueDay.day <= today
+    ).group_by(RoomTypeRevenueDay.room_type_id).all()
+    by_type = {t: (mtd, trailing) for t, mtd, trailing in windows}
+    return {t: (lifetime, *by_type.get(t, (0, 0))) for t, lifetime in db.session.query(
+        RoomTypeRevenue.room_type_id, RoomTypeRevenue.revenue)}
+
+def _reservation_windows(month_start, trailing_start, today):
+    # Before the backfill: one aggregate over the reservations themselves, read-only
+    def window(start):
+        return func.sum(case((and_(Reservation.check_in >= start, Reservation.check_in <= today),
+                              Reservation.total_price), else_=0))
+    rows = db.session.query(Reservation.room_type_id, func.sum(Reservation.total_price),
+                            window(month_start), window(trailing_start)).filter(
+        Reservation.status != 'cancelled').group_by(Reservation.room_type_id)
+    return {t: (lifetime, mtd, trailing) for t, lifetime, mtd, trailing in rows}
+
+def revenue_windows(today=None):
+    """Lifetime, month-to-date and trailing-30-day revenue per room type, O(room types) to read.
+
+    Until rebuild_revenue has backfilled the aggregates they would miss older
+    reservations, so the figures come from the reservations instead.
+    """
+    today = today or date.today()
+    month_start = today.replace(day=1)
+    trailing_start = today - timedelta(days=TRAILING_DAYS - 1)
+    source = _aggregate_windows if db.session.get(RollupWatermark, WATERMARK) else _reservation_windows
+    totals = source(month_start, trailing_start, today)
+    breakdown = []
+    for room_type_id, name in db.session.query(RoomType.id, RoomType.name).filter(
+            RoomType.id.in_(list(totals))).order_by(RoomType.name):
+        lifetime, mtd, trailing = totals[room_type_id]
+        breakdown.append({
+            'room_type': name,
+            'revenue': float(lifetime or 0),
+            'month_to_date': float(mtd or 0),
+            'trailing_30_days': float(trailing or 0)
+        })
+    return breakdown
@@ -0,0 +1,180 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import chain
+from sqlalchemy import delete, event, func, insert, inspect, not_, or_, update
+from .. import db
+from ..models.core import Reservation
+from ..models.stats import DailyStat, RollupDirtyRange, RollupWatermark
+from .changes import previous_value
+from .occupancy import ACTIVE_STATUSES, nightly_counts
+from .upsert import insert_ignore
+
+WATERMARK = 'daily_stats'
+COUNTERS = ('occupied', 'arrivals', 'departures', 'revenue', 'cancellations')
+# Changes to any other column (room_id, notes) leave the daily figures alone
+TRACKED = ('room_type_id', 'check_in', 'check_out', 'status', 'total_price')
+
+@event.listens_for(db.session, 'before_flush')
+def _track_dirty_dates(session, flush_context, instances):
+    ranges = []
+    for obj in chain(session.new, session.deleted):
+        if isinstance(obj, Reservation):
+            ranges.append((obj.check_in, obj.check_out))
+    for obj in session.dirty:
+        if not isinstance(obj, Reservation):
+            continue
+        state = inspect(obj)
+        if any(state.attrs[name].history.has_changes() for name in TRACKED):
+            ranges.append((previous_value(obj, 'check_in'), previous_value(obj, 'check_out')))
+            ranges.append((obj.check_in, obj.check_out))
+    session.add_all(RollupDirtyRange(start=start, end=end) for start, end in merge_ranges(ranges))
+
+def mark_dirty(session, ranges):
+    """Record (check_in, check_out) ranges written outside the unit of work, e.g. by executemany inserts."""
+    merged = merge_ranges(ranges)
+    if merged:
+        session.execute(insert(RollupDirtyRange), [{'start': start, 'end': end} for start, end in merged])
+
+def compute_stats(start, end):
+    """Aggregate every reservation touching start..end into DailyStat rows."""
+    stats = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    intervals = defaultdict(list)
+    rows = db.session.query(
+        Reservation.room_type_id, Reservation.check_in, Reservation.check_out,
+        Reservation.total_price, Reservation.status
+    ).filter(Reservation.check_in <= end, Reservation.check_out >= start)
+    for room_type_id, check_in, check_out, total_price, status in rows:
+        if status in ACTIVE_STATUSES:
+            intervals[room_type_id].append((check_in, check_out))
+        if start <= check_in <= end:
+            if status == 'cancelled':
+                stats[(check_in, room_type_id)]['cancellations'] += 1
+            else:
+                stats[(check_in, room_type_id)]['arrivals'] += 1
+                stats[(check_in, room_type_id)]['revenue'] += Decimal(str(total_price))
+        if start <= check_out <= end and status != 'cancelled':
+            stats[(check_out, room_type_id)]['departures'] += 1
+    for room_type_id, stays in intervals.items():
+        for offset, occupied in enumerate(nightly_counts(stays, start, end)):
+            if occupied:
+                stats[(start + timedelta(days=offset), room_type_id)]['occupied'] = occupied
+    return [dict(day=day, room_type_id=room_type_id, **counters) for (day, room_type_id), counters in stats.items()]
+
+def refresh_range(start, end):
+    DailyStat.query.filter(DailyStat.day >= start, DailyStat.day <= end).delete(synchronize_session=False)
+    rows = compute_stats(start, end)
+    if rows:
+        db.session.execute(insert(DailyStat), rows)
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted((start, end) for start, end in ranges if start and end):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def lock_watermark(name):
+    """Create or touch the named watermark row, holding its lock until commit.
+
+    Refreshes and rebuilds take it first so only one runs at a time. An UPDATE
+    rather than SELECT ... FOR UPDATE, so SQLite takes its write lock here too
+    instead of failing later when the second one starts writing.
+    """
+    db.session.execute(insert_ignore(db.session, RollupWatermark), [{'name': name, 'value': datetime.utcnow()}])
+    db.session.execute(update(RollupWatermark).where(RollupWatermark.name == name).values(value=datetime.utcnow()))
+
+def _claim_dirty():
+    return db.session.query(RollupDirtyRange.id, RollupDirtyRange.start, RollupDirtyRange.end).all()
+
+def _clear_dirty(dirty):
+    # Only the ranges read before recomputing: ones committed since are folded in next time
+    ids = [row.id for row in dirty]
+    for offset in range(0, len(ids), 500):
+        db.session.execute(delete(RollupDirtyRange).where(RollupDirtyRange.id.in_(ids[offset:offset + 500])))
+
+def rebuild_rollups():
+    lock_watermark(WATERMARK)
+    dirty = _claim_dirty()
+    DailyStat.query.delete()
+    bounds = db.session.query(func.min(Reservation.check_in), func.max(Reservation.check_out)).one()
+    if bounds[0] is not None:
+        refresh_range(bounds[0], bounds[1])
+    _clear_dirty(dirty)
+    db.session.commit()
+
+def refresh_rollups():
+    """Fold the recorded dirty ranges into daily_stats; returns how many were pending.
+
+    Run from `flask refresh-rollups` on a schedule, never from a request:
+    reads already account for pending ranges. A first run on a database
+    without a rollup does a full rebuild.
+    """
+    if db.session.get(RollupWatermark, WATERMARK) is None:
+        rebuild_rollups()
+        return 0
+    lock_watermark(WATERMARK)
+    dirty = _claim_dirty()
+    for start, end in merge_ranges((row.start, row.end) for row in dirty):
+        refresh_range(start, end)
+    _clear_dirty(dirty)
+    db.session.commit()
+    return len(dirty)
+
+def rollup_ready():
+    """Whether daily_stats has been built; until then it knows nothing of older reservations."""
+    return db.session.get(RollupWatermark, WATERMARK) is not None
+
+def _pending(start=None, end=None):
+    """Merged dirty ranges not yet in daily_stats, clipped to start..end when given."""
+    query = db.session.query(RollupDirtyRange.start, RollupDirtyRange.end)
+    if start is None:
+        return merge_ranges(query)
+    query = query.filter(RollupDirtyRange.end >= start, RollupDirtyRange.start <= end)
+    return [(max(lo, start), min(hi, end)) for lo, hi in merge_ranges(query)]
+
+def _settled(query, pending):
+    """Restrict a DailyStat query to days outside the pending ranges, which are recomputed instead."""
+    if pending:
+        query = query.filter(not_(or_(*[DailyStat.day.between(start, end) for start, end in pending])))
+    return query
+
+def _add(totals, row):
+    for name in COUNTERS:
+        totals[name] += row[name]
+
+def daily_totals(start, end):
+    """Per-day counters summed over room types, zero-filled, O(days) regardless of bookings.
+
+    Days with pending changes are recomputed from reservations rather than
+    read from daily_stats, so the figures are current without writing.
+    """
+    pending = _pending(start, end)
+    rows = _settled(db.session.query(DailyStat.day, *[func.sum(getattr(DailyStat, c)) for c in COUNTERS]).filter(
+        DailyStat.day >= start, DailyStat.day <= end), pending).group_by(DailyStat.day)
+    by_day = {row[0]: dict(zip(COUNTERS, row[1:])) for row in rows}
+    for lo, hi in pending:
+        for row in compute_stats(lo, hi):
+            _add(by_day.setdefault(row['day'], dict.fromkeys(COUNTERS, 0)), row)
+    daily = []
+    cur = start
+    while cur <= end:
+        totals = dict(by_day.get(cur, dict.fromkeys(COUNTERS, 0)))
+        totals['revenue'] = float(totals['revenue'] or 0)
+        daily.append((cur, totals))
+        cur += timedelta(days=1)
+    return daily
+
+def room_type_totals(start=None, end=None):
+    """Counters summed per room type over start..end, or over all time when no range is given."""
+    pending = _pending(start, end)
+    query = db.session.query(DailyStat.room_type_id, *[func.sum(getattr(DailyStat, c)) for c in COUNTERS])
+    if start is not None:
+        query = query.filter(DailyStat.day >= start, DailyStat.day <= end)
+    totals = {row[0]: dict(zip(COUNTERS, row[1:])) for row in _settled(query, pending).group_by(DailyStat.room_type_id)}
+    for lo, hi in pending:
+        for row in compute_stats(lo, hi):
+            _add(totals.setdefault(row['room_type_id'], dict.fromkeys(COUNTERS, 0)), row)
+    return totals
@@ -0,0 +1,129 @@
+import threading
+import time
+from datetime import date
+from sqlalchemy import event, func, select
+from .. import db
+from ..models.core import Room, Reservation
+from .changes import data_version, previous_value as _before
+from .occupancy import ACTIVE_STATUSES
+
+COUNTERS = ('total_rooms', 'occupied_rooms', 'maintenance_rooms')
+
+def occupies(status, check_in, check_out, today):
+    return (status or 'confirmed') in ACTIVE_STATUSES and check_in is not None and check_out is not None \
+        and check_in <= today < check_out
+
+class RoomCounters:
+    """Room totals kept in memory from the write path and reconciled against the database.
+
+    Reads are O(1) while the shared data version stands still. The first read
+    in a process, the first read of a new day, the first read after a commit
+    by any process and any read after RECONCILE_INTERVAL seconds recount from
+    the database; the difference found is kept as drift for monitoring.
+    """
+
+    def __init__(self, reconcile_interval=300):
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._counts = None
+        self._day = None
+        self._version = None
+        self._reconciled_at = 0
+        self.reconciles = 0
+        self.last_drift = dict.fromkeys(COUNTERS, 0)
+        self.total_drift = 0
+
+    def init_app(self, app):
+        self.reconcile_interval = app.config.get('ROOM_STATE_RECONCILE_INTERVAL', self.reconcile_interval)
+
+    def counts(self, version=None):
+        if version is None:
+            version = data_version()
+        with self._lock:
+            stale = self._counts is None or self._day != date.today() or self._version != version or \
+                time.monotonic() - self._reconciled_at > self.reconcile_interval
+        if stale:
+            self.reconcile(version)
+        with self._lock:
+            counts = dict(self._counts)
+        counts['available_rooms'] = counts['total_rooms'] - counts['occupied_rooms'] - counts['maintenance_rooms']
+        return counts
+
+    def reconcile(self, version=None):
+        today = date.today()
+        row = db.session.execute(select(
+            select(func.count(Room.id)).scalar_subquery(),
+            select(func.count(Room.id)).where(Room.status == 'maintenance').scalar_subquery(),
+            select(func.count(Reservation.id)).where(
+                Reservation.status.in_(ACTIVE_STATUSES), Reservation.check_in <= today,
+                Reservation.check_out > today).scalar_subquery()
+        )).one()
+        actual = {'total_rooms': row[0], 'maintenance_rooms': row[1], 'occupied_rooms': row[2]}
+        with self._lock:
+            if self._counts is not None and self._day == today:
+                self.last_drift = {key: actual[key] - self._counts[key] for key in COUNTERS}
+                self.total_drift += sum(abs(v) for v in self.last_drift.values())
+            self._counts = actual
+            self._day = today
+            self._version = version
+            self._reconciled_at = time.monotonic()
+            self.reconciles += 1
+
+    def apply(self, deltas):
+        with self._lock:
+            if self._counts is None or self._day != date.today():
+                return
+            for key, delta in deltas.items():
+                self._counts[key] += delta
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'counts': dict(self._counts or {}),
+                'reconciles': self.reconciles,
+                'last_drift': dict(self.last_drift),
+                'total_drift': self.total_drift,
+                'seconds_since_reconcile': round(time.monotonic() - self._reconciled_at, 1) if self._reconciled_at else None
+            }
+
+room_counters = RoomCounters()
+
+def stage_room_deltas(session, **deltas):
+    # For bulk statements that bypass the unit of work
+    staged = session.info.setdefault('room_deltas', dict.fromkeys(COUNTERS, 0))
+    for name, delta in deltas.items():
+        staged[name] += delta
+
+@event.listens_for(db.session, 'before_flush')
+def _stage_room_deltas(session, flush_context, instances):
+    today = date.today()
+    deltas = session.info.setdefault('room_deltas', dict.fromkeys(COUNTERS, 0))
+    for obj in session.new:
+        if isinstance(obj, Room):
+            deltas['total_rooms'] += 1
+            deltas['maintenance_rooms'] += obj.status == 'maintenance'
+        elif isinstance(obj, Reservation):
+            deltas['occupied_rooms'] += occupies(obj.status, obj.check_in, obj.check_out, today)
+    for obj in session.deleted:
+        if isinstance(obj, Room):
+            deltas['total_rooms'] -= 1
+            deltas['maintenance_rooms'] -= _before(obj, 'status') == 'maintenance'
+        elif isinstance(obj, Reservation):
+            deltas['occupied_rooms'] -= occupies(_before(obj, 'status'), _before(obj, 'check_in'), _before(obj, 'check_out'), today)
+    for obj in session.dirty:
+        if isinstance(obj, Room):
+            deltas['maintenance_rooms'] += (obj.status == 'maintenance') - (_before(obj, 'status') == 'maintenance')
+        elif isinstance(obj, Reservation):
+            deltas['occupied_rooms'] += occupies(obj.status, obj.check_in, obj.check_out, today) - \
+                occupies(_before(obj, 'status'), _before(obj, 'check_in'), _before(obj, 'check_out'), today)
+
+# Inserted first so listeners woken by the same commit already see the new counts
+@event.listens_for(db.session, 'after_commit', insert=True)
+def _apply_room_deltas(session):
+    deltas = session.info.pop('room_deltas', None)
+    if deltas and any(deltas.values()):
+        room_counters.apply(deltas)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_room_deltas(session):
+    session.info.pop('room_deltas', None)
@@ -0,0 +1,83 @@
+from sqlalchemy.orm import joinedload, selectinload
+from ..models.core import Room, Reservation
+from ..models.billing import Invoice
+
+class Serializer:
+    """Base for serializers: subclasses set model, list in relationships the paths
+    their dump(obj) classmethod reads, and define it.
+
+    Queries passed through load() get those relationships eagerly: many-to-one
+    paths with joinedload, which adds a LEFT OUTER JOIN without multiplying
+    rows and so stays correct under LIMIT, and collections with selectinload,
+    one extra IN query per collection. A page therefore costs the same number
+    of queries however many rows it has.
+    """
+    model = None
+    relationships = ()
+
+    @classmethod
+    def options(cls):
+        options = []
+        for path in cls.relationships:
+            entity, option = cls.model, None
+            for name in path.split('.'):
+                attribute = getattr(entity, name)
+                loader = selectinload if attribute.property.uselist else joinedload
+                option = loader(attribute) if option is None else getattr(option, loader.__name__)(attribute)
+                entity = attribute.property.mapper.class_
+            options.append(option)
+        return options
+
+    @classmethod
+    def load(cls, query):
+        return query.options(*cls.options())
+
+    @classmethod
+    def dump_many(cls, objs):
+        return [cls.dump(obj) for obj in objs]
+
+class RoomSerializer(Serializer):
+    model = Room
+    relationships = ('room_type',)
+
+    @classmethod
+    def dump(cls, r):
+        return {'id':r.id,'number':r.number,'type': r.room_type.name if r.room_type else 'N/A','status':r.status}
+
+class ReservationSerializer(Serializer):
+    model = Reservation
+    relationships = ('guest', 'room')
+
+    @classmethod
+    def dump(cls, r):
+        return {
+            'id':r.id,
+            'guest_name':r.guest.name if r.guest else 'N/A',
+            'room_number':r.room.number if r.room else 'N/A',
+            'check_in':r.check_in.isoformat() if r.check_in else None,
+            'check_out':r.check_out.isoformat() if r.check_out else None,
+            'status':r.status,
+            'total_price':float(r.total_price)
+        }
+
+class InvoiceDetailSerializer(Serializer):
+    model = Invoice
+    relationships = ('reservation.guest', 'reservation.room', 'reservation.room_type')
+
+    @classmethod
+    def dump(cls, invoice):
+        return {
+            'id': invoice.id,
+            'reservation_id': invoice.reservation_id,
+            'guest_name': invoice.reservation.guest.name,
+            'room_number': invoice.reservation.room.number if invoice.reservation.room else 'TBD',
+            'room_type': invoice.reservation.room_type.name,
+            'check_in': invoice.reservation.check_in.strftime('%Y-%m-%d'),
+            'check_out': invoice.reservation.check_out.strftime('%Y-%m-%d'),
+            'subtotal': float(invoice.subtotal),
+            'tax': float(invoice.tax),
+            'total': float(invoice.total),
+            'status': invoice.status,
+            'created_at': invoice.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'services': [{'name': s.name, 'price': float(s.price)} for s in invoice.reservation.services] if hasattr(invoice.reservation, 'services') else []
+        }
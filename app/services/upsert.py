@@ -0,0 +1,10 @@
+def insert_ignore(session, model):
+    """INSERT that skips rows whose primary key already exists, so racing writers can both create a row."""
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(model).on_conflict_do_nothing()
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(model).on_conflict_do_nothing()
+    return model.__table__.insert().prefix_with('IGNORE')
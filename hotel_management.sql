@@ -74,6 +74,8 @@ CREATE TABLE IF NOT EXISTS reservations (
 CREATE INDEX idx_reservations_check_in ON reservations (check_in_date);
 CREATE INDEX idx_reservations_check_out ON reservations (check_out_date);
 CREATE INDEX idx_reservations_status ON reservations (status);
+CREATE INDEX idx_reservations_type_stay ON reservations (room_type_id, check_in_date, check_out_date);
+CREATE INDEX idx_reservations_stay_status ON reservations (check_out_date, check_in_date, status);
 CREATE INDEX idx_rooms_status ON rooms (status);
 CREATE INDEX idx_guests_email ON guests (email);
 CREATE INDEX idx_users_username ON users (username);
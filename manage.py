@@ -6,7 +6,12 @@ app = create_app()
 
 @app.cli.command('create-db')
 def create_db():
+    from app.services.revenue import rebuild_revenue
+    from app.services.rollups import rebuild_rollups
     db.create_all()
+    # Mark the (empty) aggregates complete so reads use them from the start
+    rebuild_revenue()
+    rebuild_rollups()
     click.echo('Database created')
 
 @app.cli.command('create-admin')
@@ -22,5 +27,228 @@ def create_admin(username, password):
     db.session.commit()
     click.echo('Admin created')
 
+@app.cli.command('rebuild-nights')
+def rebuild_nights_command():
+    from app.services.nights import rebuild_nights
+    count = rebuild_nights()
+    click.echo(f'Rebuilt {count} reservation nights')
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    from app.services.rollups import rebuild_rollups
+    rebuild_rollups()
+    click.echo('Daily stats rollup rebuilt')
+
+@app.cli.command('refresh-rollups')
+def refresh_rollups_command():
+    from app.services.rollups import refresh_rollups
+    count = refresh_rollups()
+    click.echo(f'Folded {count} changed date ranges into the daily stats rollup')
+
+@app.cli.command('rebuild-revenue')
+def rebuild_revenue_command():
+    from app.services.revenue import rebuild_revenue
+    rebuild_revenue()
+    click.echo('Room type revenue aggregates rebuilt')
+
+@app.cli.command('assign-rooms')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), help='First arrival date (default today)')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), help='Last arrival date (default start)')
+@click.option('--dry-run', is_flag=True, help='Print the plan without writing it')
+def assign_rooms_command(start, end, dry_run):
+    from datetime import date
+    from app.services.assignment import assign_rooms
+    start = start.date() if start else date.today()
+    end = end.date() if end else start
+    assigned, unplaced = assign_rooms(start, end, dry_run=dry_run)
+    if not dry_run:
+        db.session.commit()
+    click.echo(f'{"Would assign" if dry_run else "Assigned"} {len(assigned)} reservations, {len(unplaced)} left unassigned')
+    for reservation_id in unplaced:
+        click.echo(f'  no room free for reservation #{reservation_id}')
+
+@app.cli.command('rebuild-inventory')
+def rebuild_inventory_command():
+    from app.services.inventory import rebuild_inventory
+    count = rebuild_inventory()
+    click.echo(f'Rebuilt {count} room inventory rows')
+
+@app.cli.command('stress-booking')
+@click.option('--workers', default=16, help='Concurrent booking threads')
+@click.option('--attempts', default=50, help='Bookings tried by each thread')
+@click.option('--rooms', default=5, help='Rooms in the scratch room type')
+@click.option('--days', default=14, help='Nights the bookings are spread over')
+@click.option('--database', default=None,
+              help='Scratch database URL, never the live one (default: a temporary SQLite file, which serializes writes)')
+def stress_booking_command(workers, attempts, rooms, days, database):
+    """Book a scratch room type from many threads at once and check nothing was overbooked."""
+    import os
+    import random
+    import tempfile
+    import threading
+    import time
+    from datetime import date, timedelta
+    from sqlalchemy.exc import OperationalError
+    from app.config import Config
+    from app.models import Guest, RoomType, Room, Reservation
+    from app.services.inventory import SoldOut
+    from app.services.occupancy import ACTIVE_STATUSES, nightly_counts
+
+    scratch = None
+    if database is None:
+        handle, scratch = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        database = f'sqlite:///{scratch}'
+    elif database == app.config['SQLALCHEMY_DATABASE_URI']:
+        raise click.BadParameter('is the configured database; point it at a scratch one', param_hint='--database')
+
+    class StressConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database
+
+    stress = create_app(StressConfig)
+    with stress.app_context():
+        db.create_all()
+        room_type = RoomType(name=f'stress-{int(time.time())}', base_price=100)
+        guest = Guest(name='Stress Test', email=f'stress-{int(time.time())}@example.invalid')
+        db.session.add_all([room_type, guest])
+        db.session.flush()
+        db.session.add_all([Room(number=f'{room_type.name}-{i}', room_type_id=room_type.id) for i in range(rooms)])
+        db.session.commit()
+        room_type_id, guest_id = room_type.id, guest.id
+        engine = db.engine.dialect.name
+    start = date.today() + timedelta(days=1)
+    totals = {'booked': 0, 'sold_out': 0, 'retries': 0}
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        with stress.app_context():
+            for _ in range(attempts):
+                check_in = start + timedelta(days=rng.randrange(days))
+                check_out = check_in + timedelta(days=rng.randint(1, 4))
+                for _ in range(20):
+                    db.session.add(Reservation(guest_id=guest_id, room_type_id=room_type_id, check_in=check_in,
+                                               check_out=check_out, num_guests=1, total_price=100))
+                    try:
+                        db.session.commit()
+                        outcome = 'booked'
+                    except SoldOut:
+                        db.session.rollback()
+                        outcome = 'sold_out'
+                    except OperationalError:
+                        # Lock timeout or deadlock victim; try the same booking again
+                        db.session.rollback()
+                        with lock:
+                            totals['retries'] += 1
+                        continue
+                    with lock:
+                        totals[outcome] += 1
+                    break
+
+    began = time.monotonic()
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - began
+
+    with stress.app_context():
+        stays = db.session.query(Reservation.check_in, Reservation.check_out).filter(
+            Reservation.room_type_id == room_type_id, Reservation.status.in_(ACTIVE_STATUSES)).all()
+        db.session.remove()
+    counts = nightly_counts(stays, start, start + timedelta(days=days + 4))
+    peak = max(counts, default=0)
+    overbooked = sum(max(count - rooms, 0) for count in counts)
+    click.echo(f'{totals["booked"]} booked, {totals["sold_out"]} sold out, {totals["retries"]} retries '
+               f'in {elapsed:.2f}s ({(totals["booked"] + totals["sold_out"]) / elapsed:.0f} attempts/s) on {engine}')
+    click.echo(f'Peak {peak} of {rooms} rooms on one night, {overbooked} overbooked room-nights')
+    if scratch:
+        os.remove(scratch)
+    if overbooked:
+        raise SystemExit(1)
+
+@app.cli.command('explain-queries')
+def explain_queries_command():
+    """Print the database's plan for each hot-path query."""
+    from datetime import date
+    from app.services.query_plans import explain, hot_queries
+    for name, statement in hot_queries(date.today()):
+        click.echo(name)
+        for line in explain(statement):
+            click.echo(f'    {line}')
+
+@app.cli.command('benchmark-indexes')
+@click.option('--reservations', default=100000, help='Synthetic reservations to generate')
+@click.option('--database', default=None, help='Scratch database URL (default: a temporary SQLite file)')
+def benchmark_indexes_command(reservations, database):
+    """Time the hot-path queries on synthetic data without and with the composite indexes."""
+    import os
+    import random
+    import tempfile
+    from datetime import date, datetime, timedelta
+    from sqlalchemy import text
+    from app.config import Config
+    from app.models import Guest, RoomType, Room, Reservation
+    from app.services.query_plans import hot_path_indexes, hot_queries, time_query
+
+    scratch = None
+    if database is None:
+        handle, scratch = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        database = f'sqlite:///{scratch}'
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database
+
+    bench = create_app(BenchConfig)
+    with bench.app_context():
+        db.create_all()
+        engine = db.engine
+        rng = random.Random(42)
+        today = date.today()
+        db.session.execute(RoomType.__table__.insert(), [
+            {'name': f'Bench {i}', 'base_price': 80 + 10 * i} for i in range(20)])
+        db.session.execute(Room.__table__.insert(), [
+            {'number': f'B{i}', 'room_type_id': i % 20 + 1, 'status': 'maintenance' if i % 40 == 0 else 'available'}
+            for i in range(400)])
+        db.session.execute(Guest.__table__.insert(), [
+            {'name': f'Guest {i}', 'email': f'bench{i}@example.invalid'} for i in range(5000)])
+        statuses = ['confirmed', 'checked-in', 'checked-out', 'cancelled']
+        for offset in range(0, reservations, 20000):
+            rows = []
+            for _ in range(min(20000, reservations - offset)):
+                check_in = today + timedelta(days=rng.randint(-1460, 365))
+                created = datetime.combine(check_in, datetime.min.time()) - timedelta(days=rng.randint(0, 120))
+                rows.append({
+                    'guest_id': rng.randint(1, 5000), 'room_type_id': rng.randint(1, 20),
+                    'room_id': rng.choice([None, rng.randint(1, 400)]), 'check_in': check_in,
+                    'check_out': check_in + timedelta(days=rng.randint(1, 10)), 'num_guests': 2,
+                    'total_price': 200, 'status': rng.choices(statuses, [3, 1, 5, 1])[0],
+                    'created_at': created, 'updated_at': created})
+            db.session.execute(Reservation.__table__.insert(), rows)
+        db.session.commit()
+
+        queries = hot_queries(today)
+        indexes = hot_path_indexes()
+        for index in indexes:
+            index.drop(engine)
+        if engine.dialect.name in ('sqlite', 'postgresql'):
+            db.session.execute(text('ANALYZE'))
+        before = [time_query(statement) for _, statement in queries]
+        for index in indexes:
+            index.create(engine)
+        if engine.dialect.name in ('sqlite', 'postgresql'):
+            db.session.execute(text('ANALYZE'))
+        after = [time_query(statement) for _, statement in queries]
+        db.session.remove()
+
+    click.echo(f'{reservations} reservations on {engine.dialect.name}')
+    click.echo(f'{"query":36} {"before ms":>10} {"after ms":>10} {"speedup":>8}')
+    for (name, _), slow, fast in zip(queries, before, after):
+        click.echo(f'{name:36} {slow * 1000:10.2f} {fast * 1000:10.2f} {slow / fast if fast else 0:7.1f}x')
+    if scratch:
+        os.remove(scratch)
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,38 @@
+"""reservation hot path indexes
+
+Revision ID: a1c3e5f7b902
+Revises: 
+Create Date: 2026-10-18 20:40:00.000000
+
+Tables are created by `flask create-db`; this revision only adds the
+composite indexes declared on Reservation and Room to databases created
+before they existed. Indexes already present are skipped.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f7b902'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_reservation_check_in_status', 'reservation', ['check_in', 'status']),
+    ('ix_reservation_stay_cover', 'reservation', ['check_out', 'check_in', 'status', 'room_type_id']),
+    ('ix_reservation_type_stay', 'reservation', ['room_type_id', 'check_in', 'check_out']),
+    ('ix_reservation_room_stay', 'reservation', ['room_id', 'check_in', 'check_out']),
+    ('ix_reservation_created_at', 'reservation', ['created_at']),
+    ('ix_room_type_status', 'room', ['room_type_id', 'status']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,25 @@
+"""invoice list index
+
+Revision ID: c4d6e8f0a213
+Revises: a1c3e5f7b902
+Create Date: 2026-10-18 22:10:00.000000
+
+Backs the (created_at, id) keyset ordering of /api/billing/invoices.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d6e8f0a213'
+down_revision = 'a1c3e5f7b902'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_invoice_created_at_id', 'invoice', ['created_at', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_invoice_created_at_id', table_name='invoice', if_exists=True)
@@ -0,0 +1,141 @@
+"""feature tables
+
+Revision ID: c6e8a0b2d147
+Revises: f2a4c6e8b035
+Create Date: 2026-10-19 12:00:00.000000
+
+Creates the tables added since the original schema: per-night facts, room
+inventory, report rollups and revenue aggregates, the activity feed and
+rate rules. Tables already present are skipped. Fill them on an existing
+database with rebuild-nights, rebuild-inventory, rebuild-rollups and
+rebuild-revenue; until then inventory and reports are counted from the
+reservations.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e8a0b2d147'
+down_revision = 'f2a4c6e8b035'
+branch_labels = None
+depends_on = None
+
+NIGHT_INDEXES = [
+    ('ix_reservation_night_reservation_id', ['reservation_id']),
+    ('ix_reservation_night_night_status', ['night', 'status']),
+    ('ix_reservation_night_type_night', ['room_type_id', 'night']),
+]
+
+
+def upgrade():
+    op.create_table(
+        'reservation_night',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('reservation_id', sa.Integer(), nullable=False),
+        sa.Column('room_type_id', sa.Integer(), nullable=False),
+        sa.Column('room_id', sa.Integer(), nullable=True),
+        sa.Column('night', sa.Date(), nullable=False),
+        sa.Column('nightly_rate', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.ForeignKeyConstraint(['reservation_id'], ['reservation.id']),
+        sa.ForeignKeyConstraint(['room_type_id'], ['room_type.id']),
+        sa.ForeignKeyConstraint(['room_id'], ['room.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    for name, columns in NIGHT_INDEXES:
+        op.create_index(name, 'reservation_night', columns, unique=False, if_not_exists=True)
+    op.create_table(
+        'room_inventory',
+        sa.Column('room_type_id', sa.Integer(), nullable=False),
+        sa.Column('night', sa.Date(), nullable=False),
+        sa.Column('booked', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['room_type_id'], ['room_type.id']),
+        sa.PrimaryKeyConstraint('room_type_id', 'night'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'daily_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('room_type_id', sa.Integer(), nullable=False),
+        sa.Column('occupied', sa.Integer(), nullable=False),
+        sa.Column('arrivals', sa.Integer(), nullable=False),
+        sa.Column('departures', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('cancellations', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['room_type_id'], ['room_type.id']),
+        sa.PrimaryKeyConstraint('day', 'room_type_id'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'rollup_dirty_range',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('start', sa.Date(), nullable=False),
+        sa.Column('end', sa.Date(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'rollup_watermark',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('value', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'room_type_revenue',
+        sa.Column('room_type_id', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['room_type_id'], ['room_type.id']),
+        sa.PrimaryKeyConstraint('room_type_id'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'room_type_revenue_day',
+        sa.Column('room_type_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['room_type_id'], ['room_type.id']),
+        sa.PrimaryKeyConstraint('room_type_id', 'day'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'activity_event',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(length=30), nullable=False),
+        sa.Column('icon', sa.String(length=10), nullable=True),
+        sa.Column('text', sa.String(length=255), nullable=False),
+        sa.Column('ref_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_table(
+        'rate_rule',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('room_type_id', sa.Integer(), nullable=True),
+        sa.Column('start_date', sa.Date(), nullable=True),
+        sa.Column('end_date', sa.Date(), nullable=True),
+        sa.Column('days_of_week', sa.String(length=20), nullable=True),
+        sa.Column('min_nights', sa.Integer(), nullable=True),
+        sa.Column('min_occupancy', sa.Numeric(precision=5, scale=2), nullable=True),
+        sa.Column('percent', sa.Numeric(precision=6, scale=2), nullable=False),
+        sa.Column('active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['room_type_id'], ['room_type.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    for table in ('rate_rule', 'activity_event', 'room_type_revenue_day', 'room_type_revenue', 'rollup_watermark',
+                  'rollup_dirty_range', 'daily_stats', 'room_inventory'):
+        op.drop_table(table, if_exists=True)
+    for name, _ in reversed(NIGHT_INDEXES):
+        op.drop_index(name, table_name='reservation_night', if_exists=True)
+    op.drop_table('reservation_night', if_exists=True)
@@ -0,0 +1,33 @@
+"""dropdown covering indexes
+
+Revision ID: e7f9a1b3c524
+Revises: c4d6e8f0a213
+Create Date: 2026-10-18 23:05:00.000000
+
+(id, name) indexes so the guest and room type dropdowns, which request
+?fields=id,name, are answered from the index without reading table rows.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7f9a1b3c524'
+down_revision = 'c4d6e8f0a213'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_guest_id_name', 'guest', ['id', 'name']),
+    ('ix_room_type_id_name', 'room_type', ['id', 'name']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,32 @@
+"""shared data version
+
+Revision ID: f2a4c6e8b035
+Revises: e7f9a1b3c524
+Create Date: 2026-10-19 09:30:00.000000
+
+Per-model write counters that every process reads to invalidate the
+report cache.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a4c6e8b035'
+down_revision = 'e7f9a1b3c524'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'data_version',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('data_version', if_exists=True)
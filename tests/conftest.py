@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app import create_app, db
+from app.config import Config
+from app.models import Guest, Reservation, Room, RoomType, User
+
+class TestConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    QUERY_BUDGET = 25
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(username='admin', role='admin')
+        user.set_password('admin')
+        db.session.add(user)
+        room_type = RoomType(name='Double', base_price=120)
+        db.session.add(room_type)
+        db.session.flush()
+        db.session.add_all(Room(number=str(100 + i), room_type_id=room_type.id, status='available') for i in range(20))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin'})
+    return client
+
+@pytest.fixture
+def seed(app):
+    """seed(n) adds n guests with one past checked-out reservation each."""
+    def seed(n):
+        room_type = RoomType.query.first()
+        rooms = Room.query.all()
+        guests = [Guest(name=f'Guest {i}', email=f'guest{i}@example.com') for i in range(n)]
+        db.session.add_all(guests)
+        db.session.flush()
+        start = date.today() - timedelta(days=400)
+        for i, guest in enumerate(guests):
+            check_in = start + timedelta(days=i % 300)
+            db.session.add(Reservation(guest_id=guest.id, room_type_id=room_type.id, room_id=rooms[i % len(rooms)].id,
+                                       check_in=check_in, check_out=check_in + timedelta(days=2), num_guests=2,
+                                       total_price=240, status='checked-out'))
+        db.session.commit()
+    return seed
@@ -0,0 +1,28 @@
+from datetime import date, timedelta
+
+from sqlalchemy import insert, update
+
+from app import db
+from app.models import DataVersion, Guest, Reservation, Room
+
+def test_snapshot_follows_commits_from_other_processes(app, client):
+    guest = Guest(name='Dashboard', email='dashboard@example.com')
+    db.session.add(guest)
+    db.session.commit()
+    before = client.get('/api/dashboard/stats').get_json()
+    # What another worker's commit leaves behind: the row and a bumped shared version, no local hooks
+    db.session.execute(insert(Reservation), [{'guest_id': guest.id, 'room_type_id': 1, 'check_in': date.today(),
+                                              'check_out': date.today() + timedelta(days=1), 'num_guests': 1,
+                                              'total_price': 120, 'status': 'confirmed'}])
+    db.session.execute(update(DataVersion).values(version=DataVersion.version + 1))
+    db.session.commit()
+    after = client.get('/api/dashboard/stats').get_json()
+    assert after['todays_checkins'] == before['todays_checkins'] + 1
+
+def test_room_counters_follow_commits_from_other_processes(app, client):
+    before = client.get('/api/dashboard/room-state').get_json()['counts']
+    db.session.execute(update(Room).where(Room.id == 1).values(status='maintenance'))
+    db.session.execute(update(DataVersion).values(version=DataVersion.version + 1))
+    db.session.commit()
+    after = client.get('/api/dashboard/room-state').get_json()['counts']
+    assert after['maintenance_rooms'] == before['maintenance_rooms'] + 1
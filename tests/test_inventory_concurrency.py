@@ -0,0 +1,75 @@
+import os
+import threading
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app import create_app, db
+from app.models import Guest, Reservation, Room, RoomInventory, RoomType
+from app.services.inventory import SoldOut
+from tests.conftest import TestConfig
+
+ROOMS = 5
+WORKERS = 12
+
+@pytest.fixture
+def shared_app(tmp_path):
+    """An app on a database every thread connects to separately: TEST_DATABASE_URL when set
+    (row locks on a server database), else a SQLite file (one writer at a time)."""
+    class SharedConfig(TestConfig):
+        SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or f'sqlite:///{tmp_path / "hotel.db"}'
+        QUERY_BUDGET = None
+
+    app = create_app(SharedConfig)
+    with app.app_context():
+        db.create_all()
+        room_type = RoomType(name='Concurrency', base_price=100)
+        guest = Guest(name='Concurrency', email='concurrency@example.invalid')
+        db.session.add_all([room_type, guest])
+        db.session.flush()
+        db.session.add_all(Room(number=f'C{i}', room_type_id=room_type.id) for i in range(ROOMS))
+        db.session.commit()
+        ids = room_type.id, guest.id
+        db.session.remove()
+    yield app, ids
+    with app.app_context():
+        db.drop_all()
+
+def test_last_rooms_go_to_exactly_one_booking_each(shared_app):
+    app, (room_type_id, guest_id) = shared_app
+    check_in = date.today() + timedelta(days=30)
+    check_out = check_in + timedelta(days=3)
+    outcomes = []
+    ready = threading.Barrier(WORKERS)
+
+    def book():
+        with app.app_context():
+            ready.wait()
+            for _ in range(50):
+                db.session.add(Reservation(guest_id=guest_id, room_type_id=room_type_id, check_in=check_in,
+                                           check_out=check_out, num_guests=1, total_price=300))
+                try:
+                    db.session.commit()
+                    outcomes.append('booked')
+                except SoldOut:
+                    db.session.rollback()
+                    outcomes.append('sold_out')
+                except OperationalError:
+                    # Lock timeout or deadlock victim; try again
+                    db.session.rollback()
+                    continue
+                break
+            db.session.remove()
+
+    threads = [threading.Thread(target=book) for _ in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(outcomes) == ['booked'] * ROOMS + ['sold_out'] * (WORKERS - ROOMS)
+    with app.app_context():
+        assert Reservation.query.filter_by(room_type_id=room_type_id).count() == ROOMS
+        booked = [row.booked for row in RoomInventory.query.filter_by(room_type_id=room_type_id)]
+        assert booked == [ROOMS] * 3
@@ -0,0 +1,21 @@
+from datetime import date, timedelta
+
+from app import db
+from app.models import Guest, RateRule, RoomInventory
+from app.services.pricing import quote
+
+def test_occupancy_rules_read_the_shared_inventory(app, client):
+    # 20 rooms: from 50% booked a night costs 20% more
+    db.session.add(RateRule(name='Busy', kind='occupancy', min_occupancy=50, percent=20))
+    guest = Guest(name='Occupancy', email='occupancy@example.com')
+    db.session.add(guest)
+    db.session.commit()
+    check_in = date.today() + timedelta(days=40)
+    for _ in range(10):
+        response = client.post('/api/reservations', json={'guest_id': guest.id, 'room_type_id': 1, 'check_in': str(check_in),
+                                                          'check_out': str(check_in + timedelta(days=1)), 'num_guests': 1})
+        assert response.status_code == 200, response.get_json()
+    rows = RoomInventory.query.count()
+    # The second night has no inventory row yet; it is counted without creating one
+    assert quote(1, check_in, check_in + timedelta(days=2))['nightly'] == [144, 120]
+    assert RoomInventory.query.count() == rows
@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.blueprints.core import RESERVATION_WRITE_BUDGET
+from app.services.serializers import ReservationSerializer
+
+LISTS = ('/api/rooms', '/api/guests', '/api/reservations', '/api/services', '/api/billing/invoices')
+
+@contextmanager
+def statements():
+    executed = []
+    def count(*args):
+        executed.append(args[2])
+    event.listen(Engine, 'before_cursor_execute', count)
+    try:
+        yield executed
+    finally:
+        event.remove(Engine, 'before_cursor_execute', count)
+
+def book(client, check_in, nights):
+    return client.post('/api/reservations', json={
+        'guest_id': 1, 'room_type_id': 1, 'check_in': str(check_in),
+        'check_out': str(check_in + timedelta(days=nights)), 'num_guests': 2})
+
+@pytest.mark.parametrize('rows', [5, 200])
+def test_lists_stay_within_budget(client, seed, rows):
+    seed(rows)
+    for url in LISTS:
+        assert client.get(url).status_code == 200, url
+
+@pytest.mark.parametrize('nights', [1, 30])
+def test_reservation_writes_stay_within_budget(client, seed, nights):
+    seed(5)
+    check_in = date.today() + timedelta(days=60)
+    response = book(client, check_in, nights)
+    assert response.status_code == 200, response.get_json()
+    reservation_id = response.get_json()['id']
+    response = client.put(f'/api/reservations/{reservation_id}',
+                          json={'check_out': str(check_in + timedelta(days=2 * nights))})
+    assert response.status_code == 200, response.get_json()
+    assert client.put(f'/api/reservations/{reservation_id}', json={'status': 'checked-in'}).status_code == 200
+    assert client.delete(f'/api/reservations/{reservation_id}').status_code == 200
+
+def test_reservation_statements_independent_of_stay_length(client, seed):
+    seed(5)
+    check_in = date.today() + timedelta(days=60)
+    # Warm the per-process caches so both bookings take the same path
+    book(client, check_in - timedelta(days=30), 1)
+    counts = []
+    for nights in (1, 60):
+        with statements() as executed:
+            assert book(client, check_in, nights).status_code == 200
+        counts.append(len(executed))
+    assert counts[0] == counts[1] <= RESERVATION_WRITE_BUDGET
+
+def test_lazy_loading_exceeds_budget(client, seed, monkeypatch):
+    seed(50)
+    monkeypatch.setattr(ReservationSerializer, 'relationships', ())
+    with pytest.raises(AssertionError, match='budget is 25'):
+        client.get('/api/reservations')
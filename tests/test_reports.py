@@ -0,0 +1,8 @@
+import pytest
+
+@pytest.mark.parametrize('url', ['/api/reports/performance', '/api/reports/length-of-stay', '/api/reports/pace'])
+def test_malformed_dates_are_rejected(client, url):
+    response = client.get(f'{url}?start_date=2026-13-01')
+    assert response.status_code == 400
+    assert 'YYYY-MM-DD' in response.get_json()['error']
+    assert client.get(f'{url}?start_date=2026-01-01&end_date=2026-01-31').status_code == 200
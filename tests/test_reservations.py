@@ -0,0 +1,11 @@
+from datetime import date, timedelta
+
+def test_update_with_unknown_room_type_is_rejected(client, seed):
+    seed(1)
+    check_in = date.today() + timedelta(days=10)
+    response = client.post('/api/reservations', json={'guest_id': 1, 'room_type_id': 1, 'check_in': str(check_in),
+                                                      'check_out': str(check_in + timedelta(days=2)), 'num_guests': 1})
+    reservation_id = response.get_json()['id']
+    response = client.put(f'/api/reservations/{reservation_id}', json={'room_type_id': 999})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid room type'}
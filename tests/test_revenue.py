@@ -0,0 +1,31 @@
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from app import db
+from app.models import Guest, Reservation, RoomTypeRevenue
+from app.services.revenue import rebuild_revenue, revenue_windows
+
+def test_reservations_from_before_the_aggregates_are_counted(app, client):
+    # Rows written straight to the table, as on a database that predates the aggregates
+    guest = Guest(name='Existing', email='existing@example.com')
+    db.session.add(guest)
+    db.session.commit()
+    today = date.today()
+    db.session.execute(insert(Reservation), [
+        {'guest_id': guest.id, 'room_type_id': 1, 'check_in': today - timedelta(days=400 + i),
+         'check_out': today - timedelta(days=398 + i), 'num_guests': 1, 'total_price': 100, 'status': 'checked-out'}
+        for i in range(5)])
+    db.session.commit()
+    check_in = today + timedelta(days=5)
+    response = client.post('/api/reservations', json={'guest_id': guest.id, 'room_type_id': 1, 'check_in': str(check_in),
+                                                      'check_out': str(check_in + timedelta(days=1)), 'num_guests': 1})
+    assert response.status_code == 200, response.get_json()
+    total = float(db.session.get(Reservation, response.get_json()['id']).total_price)
+
+    before = revenue_windows()
+    assert before[0]['revenue'] == 500 + total
+    assert client.get('/api/dashboard/stats').status_code == 200
+    assert db.session.get(RoomTypeRevenue, 1).revenue == total
+    rebuild_revenue()
+    assert revenue_windows() == before
@@ -0,0 +1,70 @@
+from datetime import date, timedelta
+
+from app import db
+from app.models import DailyStat, RollupDirtyRange, RollupWatermark
+from app.services.cache import report_cache
+from app.services.rollups import daily_totals, rebuild_rollups, refresh_rollups, room_type_totals
+
+def book(client, check_in, nights, **fields):
+    response = client.post('/api/reservations', json=dict({
+        'guest_id': 1, 'room_type_id': 1, 'check_in': str(check_in),
+        'check_out': str(check_in + timedelta(days=nights)), 'num_guests': 2}, **fields))
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['id']
+
+def snapshot(start, end):
+    return daily_totals(start, end), room_type_totals(start, end), room_type_totals()
+
+def test_reads_include_pending_changes_without_writing(app, client, seed):
+    seed(30)
+    refresh_rollups()
+    start = date.today() + timedelta(days=10)
+    reservation_id = book(client, start, 3)
+    client.put(f'/api/reservations/{reservation_id}', json={'check_in': str(start + timedelta(days=1)),
+                                                            'check_out': str(start + timedelta(days=5))})
+    book(client, start, 2)
+    assert RollupDirtyRange.query.count()
+    stats = DailyStat.query.count()
+    pending = snapshot(start - timedelta(days=2), start + timedelta(days=7))
+    assert client.get(f'/api/reports/occupancy?start_date={start}&end_date={start + timedelta(days=7)}').status_code == 200
+    assert db.session.query(DailyStat).count() == stats
+    occupied = [totals['occupied'] for _, totals in pending[0]]
+    assert occupied == [0, 0, 1, 2, 1, 1, 1, 0, 0, 0]
+    assert refresh_rollups() > 0
+    assert RollupDirtyRange.query.count() == 0
+    assert snapshot(start - timedelta(days=2), start + timedelta(days=7)) == pending
+    rebuild_rollups()
+    assert snapshot(start - timedelta(days=2), start + timedelta(days=7)) == pending
+
+def test_refresh_without_rollup_rebuilds(app, seed):
+    seed(30)
+    RollupDirtyRange.query.delete()
+    db.session.commit()
+    assert db.session.get(RollupWatermark, 'daily_stats') is None
+    refresh_rollups()
+    assert db.session.get(RollupWatermark, 'daily_stats') is not None
+    assert sum(totals['departures'] for totals in room_type_totals().values()) == 30
+
+def test_bulk_bookings_mark_dates_dirty(app, client):
+    refresh_rollups()
+    check_in = date.today() + timedelta(days=20)
+    response = client.post('/api/reservations/bulk', json={'reservations': [
+        {'guest': {'name': f'Bulk {i}', 'email': f'bulk{i}@example.com'}, 'room_type_id': 1,
+         'check_in': str(check_in), 'check_out': str(check_in + timedelta(days=2)), 'num_guests': 1}
+        for i in range(4)]})
+    assert response.status_code == 200, response.get_json()
+    assert [totals['arrivals'] for _, totals in daily_totals(check_in, check_in)] == [4]
+    refresh_rollups()
+    assert [totals['arrivals'] for _, totals in daily_totals(check_in, check_in)] == [4]
+
+def test_reports_read_reservations_until_the_rollup_is_built(app, client, seed):
+    seed(30)
+    RollupDirtyRange.query.delete()
+    db.session.commit()
+    day = date.today() - timedelta(days=400)
+    url = f'/revenue?start_date={day - timedelta(days=1)}&end_date={day + timedelta(days=2)}'
+    before = client.get(url).get_json()['daily']
+    assert [row['revenue'] for row in before] == [0, 240, 240, 240]
+    rebuild_rollups()
+    report_cache.clear()
+    assert client.get(url).get_json()['daily'] == before